@@ -2,14 +2,19 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-from textblob import TextBlob
 import numpy as np
 from wordcloud import WordCloud
 import matplotlib.pyplot as plt
 from io import BytesIO
 import time
 from datetime import datetime
-from utils.fetch_tiktok import TikTokCommentFetcher
+from utils.trends import SentimentTrendTracker, compute_sentiment_trend
+from utils.aggregation import EngagementAggregator
+from utils.dedup import CommentDeduplicator
+from utils.sentiment import analyze_text
+from utils.live_stream import LiveAnalysisProducer
+from utils.store import CommentStore
+from utils.sampling import ApproximateScanner
 from typing import Tuple
 
 # Configure Streamlit page
@@ -73,21 +78,9 @@ def load_data(uploaded_file) -> Tuple[pd.DataFrame, str | None]:
         return pd.DataFrame(), str(e)
 
 def analyze_sentiment(text: str) -> tuple[float, float, str]:
-    """Analyze sentiment of text and return polarity, subjectivity, and classification"""
+    """Analyze sentiment of text (TextBlob + emoji/slang lexicon) and return polarity, subjectivity, and classification"""
     try:
-        blob = TextBlob(text)
-        sentiment = blob.sentiment
-        polarity = float(sentiment.polarity)  # type: ignore
-        subjectivity = float(sentiment.subjectivity)  # type: ignore
-        
-        if polarity > 0.1:
-            classification = "positive"
-        elif polarity < -0.1:
-            classification = "negative"
-        else:
-            classification = "neutral"
-            
-        return polarity, subjectivity, classification
+        return analyze_text(text)
     except Exception as e:
         st.error(f"Error during sentiment analysis: {e}")
         return 0.0, 0.0, "neutral"
@@ -147,6 +140,107 @@ def show_polarity_chart(df):
     )
     st.plotly_chart(fig_hist, use_container_width=True, theme="streamlit")
 
+TREND_WINDOWS = {
+    "15 minutes": "15min",
+    "1 hour": "1h",
+    "6 hours": "6h",
+    "1 day": "1D"
+}
+
+@st.cache_data(show_spinner=False)
+def cached_sentiment_trend(df: pd.DataFrame, window: str) -> pd.DataFrame:
+    """Compute the trend table for a full DataFrame once per window size."""
+    return compute_sentiment_trend(df, window=window)
+
+def show_trend_chart(trend_df, container=None):
+    """Display polarity trend over time windows"""
+    if trend_df is None or trend_df.empty:
+        return
+    
+    target = container if container is not None else st
+    
+    fig_trend = px.line(
+        trend_df,
+        x="window",
+        y=["polarity", "rolling_polarity", "ewma_polarity"],
+        line_dash="video_id" if trend_df['video_id'].nunique() > 1 else None,
+        title="Polarity Trend",
+        labels={"window": "Time Window", "value": "Polarity", "variable": "Series"},
+        markers=True
+    )
+    target.plotly_chart(fig_trend, use_container_width=True, theme="streamlit")
+    
+    share_df = trend_df.groupby("window")[["positive_share", "neutral_share", "negative_share"]].mean()
+    fig_share = px.area(
+        share_df,
+        title="Sentiment Share per Window",
+        labels={"window": "Time Window", "value": "Share", "variable": "Sentiment"},
+        color_discrete_map={
+            'positive_share': '#22c55e',
+            'neutral_share': '#f59e0b', 
+            'negative_share': '#ef4444'
+        }
+    )
+    target.plotly_chart(fig_share, use_container_width=True, theme="streamlit")
+
+@st.cache_data(show_spinner=False)
+def build_engagement_aggregator(df: pd.DataFrame, videos: pd.DataFrame | None = None) -> EngagementAggregator:
+    """Build the engagement cubes once per dataset; drill-downs reuse them."""
+    return EngagementAggregator(df, videos)
+
+def show_engagement_breakdown(aggregator: EngagementAggregator, key_prefix: str = "engagement"):
+    """Display like-weighted sentiment with drill-down filters"""
+    options = aggregator.filter_options()
+    
+    col1, col2 = st.columns([1, 3])
+    
+    with col1:
+        dimension = st.radio(
+            "Group by:",
+            ["video", "creator", "hashtag"],
+            format_func=str.capitalize,
+            key=f"{key_prefix}_dimension"
+        )
+        verified_only = st.checkbox("Verified users only", key=f"{key_prefix}_verified")
+    
+    with col2:
+        creators = st.multiselect("Creators:", options["creator"], key=f"{key_prefix}_creators")
+        hashtags = st.multiselect("Hashtags:", options["hashtag"], key=f"{key_prefix}_hashtags")
+    
+    filters = {"creators": creators, "hashtags": hashtags, "verified_only": verified_only}
+    totals = aggregator.totals(**filters)
+    
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Weighted Polarity", f"{totals['weighted_polarity']:.3f}")
+    with col2:
+        st.metric("Weighted Positive", f"{totals['positive_share'] * 100:.1f}%")
+    with col3:
+        st.metric("Weighted Negative", f"{totals['negative_share'] * 100:.1f}%")
+    with col4:
+        st.metric("Total Likes", f"{int(totals['likes']):,}")
+    
+    breakdown = aggregator.query(dimension, **filters)
+    if breakdown.empty:
+        st.info("No comments match the selected filters")
+        return
+    
+    key = breakdown.columns[0]
+    fig_weighted = px.bar(
+        breakdown.head(20),
+        x=key,
+        y=["positive_share", "neutral_share", "negative_share"],
+        title=f"Like-Weighted Sentiment by {dimension.capitalize()}",
+        labels={key: dimension.capitalize(), "value": "Weighted Share", "variable": "Sentiment"},
+        color_discrete_map={
+            'positive_share': '#22c55e',
+            'neutral_share': '#f59e0b', 
+            'negative_share': '#ef4444'
+        }
+    )
+    st.plotly_chart(fig_weighted, use_container_width=True, theme="streamlit")
+    st.dataframe(breakdown, use_container_width=True)
+
 def show_sample_comments(df):
     """Show sample comments by sentiment"""
     if 'sentiment' not in df.columns:
@@ -177,7 +271,7 @@ def show_sample_comments(df):
         st.info(f"No {sentiment_choice} comments found")
 
 def generate_wordcloud(df):
-    """Generate simple word cloud"""
+    """Generate simple word cloud (honours a ``weight`` column if present)"""
     # Find text column
     text_col = None
     for col in ['comment_text', 'text', 'original_text', 'cleaned_comment']:
@@ -187,6 +281,10 @@ def generate_wordcloud(df):
     
     if not text_col:
         return None
+    
+    if 'weight' in df.columns and len(df):
+        # Weighted samples (approximate mode): resample so each row counts as much as the rows it represents
+        df = df.sample(n=len(df), weights='weight', replace=True, random_state=42)
         
     text_data = ' '.join(df[text_col].dropna().astype(str).tolist())
     if not text_data.strip():
@@ -210,6 +308,202 @@ def generate_wordcloud(df):
     buf.seek(0)
     return buf
 
+@st.cache_resource(show_spinner=False)
+def get_comment_store() -> CommentStore:
+    """Shared local history store (one per server process)."""
+    return CommentStore()
+
+def show_history():
+    """Dashboards over the local comment history"""
+    st.subheader("🗄️ Comment History")
+    store = get_comment_store()
+    stats = store.stats()
+    
+    if not stats['comments']:
+        st.info("No stored comments yet. Save results from the Live API Demo or the Data Analysis tab.")
+        return
+    
+    st.caption(f"{stats['comments']:,} comments across {stats['videos']:,} videos "
+               f"({stats['first_comment']} → {stats['last_comment']})")
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        creator = st.selectbox("Creator:", ["All creators"] + store.creators())
+    with col2:
+        days = st.select_slider("Time range (days):", options=[1, 7, 30, 90, 365], value=7)
+    with col3:
+        bucket = st.selectbox("Trend bucket:", ["hour", "day", "week"], index=1)
+    
+    filters = {"days": days}
+    if creator != "All creators":
+        filters["author"] = creator
+    
+    summary = store.sentiment_summary(**filters)
+    if summary.empty:
+        st.info(f"No comments in the last {days} days for this selection")
+        return
+    
+    total = int(summary['comments'].sum())
+    counts = summary.set_index('sentiment')['comments']
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Comments", f"{total:,}")
+    with col2:
+        st.metric("Positive", f"{counts.get('positive', 0) / total * 100:.1f}%")
+    with col3:
+        st.metric("Negative", f"{counts.get('negative', 0) / total * 100:.1f}%")
+    with col4:
+        avg_polarity = (summary['avg_polarity'] * summary['comments']).sum() / total
+        st.metric("Avg Polarity", f"{avg_polarity:.3f}")
+    
+    trend = store.sentiment_trend(bucket=bucket, **filters)
+    fig_history = px.bar(
+        trend,
+        x="period",
+        y=["positive", "neutral", "negative"],
+        title="Stored Comments over Time",
+        labels={"period": bucket.capitalize(), "value": "Comments", "variable": "Sentiment"},
+        color_discrete_map={
+            'positive': '#22c55e',
+            'neutral': '#f59e0b', 
+            'negative': '#ef4444'
+        }
+    )
+    st.plotly_chart(fig_history, use_container_width=True, theme="streamlit")
+    
+    st.dataframe(store.video_summary(**filters), use_container_width=True)
+
+APPROX_POLL_SECONDS = 0.5
+
+def show_approximate_analysis(uploaded_file):
+    """Approximate Data Analysis view backed by a background stratified sample"""
+    scan_key = f"{uploaded_file.name}-{uploaded_file.size}"
+    if st.session_state.get('approx_key') != scan_key:
+        previous = st.session_state.get('approx_scanner')
+        if previous is not None:
+            previous.stop()
+        scanner = ApproximateScanner(BytesIO(uploaded_file.getvalue()), total_bytes=uploaded_file.size)
+        st.session_state['approx_key'] = scan_key
+        st.session_state['approx_scanner'] = scanner
+        st.session_state['approx_wordcloud'] = None
+        scanner.start()
+    
+    scanner = st.session_state['approx_scanner']
+    st.fragment(run_every=None if scanner.done else APPROX_POLL_SECONDS)(render_approximate_dashboard)()
+
+def render_approximate_dashboard():
+    """Render the latest approximate (or, once finished, exact) estimates"""
+    scanner = st.session_state['approx_scanner']
+    snapshot = scanner.snapshot()
+    
+    if snapshot['error']:
+        st.error(f"Error loading file: {snapshot['error']}")
+        return
+    if not snapshot['rows_scanned'] and not snapshot['sample_rows']:
+        st.info("⚡ Drawing a random sample of rows...")
+        return
+    
+    # Only pilot-sample estimates carry confidence intervals; prefix counts are labelled as such
+    sampled = snapshot['method'] == "sample"
+    if snapshot['exact']:
+        st.success(f"✅ Exact results over all {snapshot['rows_scanned']:,} rows")
+    elif sampled:
+        st.progress(
+            snapshot['progress'],
+            text=f"⚡ Approximate: scanned {snapshot['rows_scanned']:,} of ~{snapshot['estimated_total_rows']:,} rows, "
+                 f"exact counts so far plus {snapshot['sample_rows']:,} rows sampled across the file "
+                 f"(95% confidence intervals narrow as the scan runs)"
+        )
+    else:
+        st.progress(
+            snapshot['progress'],
+            text=f"⚡ Partial: numbers below cover the first {snapshot['rows_scanned']:,} rows only"
+        )
+    
+    shares = snapshot['shares']
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        prefix = "" if snapshot['exact'] else "~"
+        st.metric("Total Comments", f"{prefix}{snapshot['estimated_total_rows']:,}")
+    for column, sentiment in zip((col2, col3, col4), ("positive", "negative", "neutral")):
+        with column:
+            if sentiment not in shares:
+                st.metric(sentiment.capitalize(), "N/A")
+                continue
+            estimate = shares[sentiment]
+            margin = (estimate['upper'] - estimate['lower']) / 2 * 100
+            value = f"{estimate['share'] * 100:.1f}%" + (f" ± {margin:.1f}" if sampled else "")
+            st.metric(sentiment.capitalize(), value,
+                      help=f"95% CI: {estimate['lower'] * 100:.2f}% – {estimate['upper'] * 100:.2f}%" if sampled else None)
+    
+    st.divider()
+    
+    if shares:
+        st.subheader("📊 Sentiment Analysis")
+        share_df = pd.DataFrame([
+            {"sentiment": sentiment, "share": estimate['share'],
+             "error_plus": estimate['upper'] - estimate['share'],
+             "error_minus": estimate['share'] - estimate['lower']}
+            for sentiment, estimate in shares.items()
+        ])
+        fig_shares = px.bar(
+            share_df,
+            x="sentiment",
+            y="share",
+            error_y="error_plus",
+            error_y_minus="error_minus",
+            title="Sentiment Share" + (" (95% CI)" if sampled else ""),
+            color="sentiment",
+            color_discrete_map={
+                'positive': '#22c55e',
+                'neutral': '#f59e0b', 
+                'negative': '#ef4444'
+            }
+        )
+        fig_shares.update_layout(showlegend=False)
+        st.plotly_chart(fig_shares, use_container_width=True, theme="streamlit")
+    
+    polarity = snapshot['polarity']
+    if polarity is not None:
+        st.subheader("📈 Polarity Distribution")
+        if sampled:
+            st.caption(f"Mean polarity {polarity['mean']:.3f} "
+                       f"(95% CI {polarity['lower']:.3f} – {polarity['upper']:.3f})")
+        else:
+            st.caption(f"Mean polarity {polarity['mean']:.3f}")
+        bins = polarity['bins']
+        fig_hist = px.bar(
+            x=(bins[:-1] + bins[1:]) / 2,
+            y=polarity['histogram'],
+            title="Polarity Distribution" + (" (estimated)" if sampled else ""),
+            labels={"x": "polarity", "y": "count"}
+        )
+        fig_hist.update_traces(width=bins[1] - bins[0])
+        st.plotly_chart(fig_hist, use_container_width=True, theme="streamlit")
+    
+    # The word cloud is the slowest chart: build it once from the first sample
+    # and once more when the scan finishes
+    if snapshot['text_col']:
+        st.subheader("☁️ Word Cloud")
+        cached = st.session_state.get('approx_wordcloud')
+        if cached is None or (snapshot['exact'] and not cached[0]):
+            wordcloud_img = generate_wordcloud(snapshot['sample'])
+            cached = (snapshot['exact'], wordcloud_img.getvalue() if wordcloud_img else None)
+            st.session_state['approx_wordcloud'] = cached
+        if cached[1]:
+            st.image(cached[1], use_column_width=True)
+        if snapshot['sample_kind'] == "random":
+            st.caption(f"Based on {snapshot['sample_rows']:,} rows sampled across the file, weighted")
+        else:
+            st.caption(f"Based on the first {snapshot['sample_rows']:,} rows")
+    
+    if snapshot['exact'] and not st.session_state.get('approx_final_rendered') == st.session_state.get('approx_key'):
+        # One full rerun so the fragment stops polling
+        st.session_state['approx_final_rendered'] = st.session_state.get('approx_key')
+        st.rerun()
+
+LIVE_POLL_SECONDS = 0.5
+
 def live_api_demo():
     """Live API demonstration feature for portfolio"""
     st.subheader("🚀 Live TikTok API Demo")
@@ -231,6 +525,14 @@ def live_api_demo():
             value=30,
             help="More comments = more realistic demonstration"
         )
+        
+        st.selectbox(
+            "Trend window:",
+            options=list(TREND_WINDOWS.values()),
+            index=1,
+            format_func=lambda w: next(k for k, v in TREND_WINDOWS.items() if v == w),
+            key="live_trend_window"
+        )
     
     with col2:
         st.markdown("**🎯 Demo Features:**")
@@ -239,87 +541,147 @@ def live_api_demo():
         st.write("✅ Live sentiment analysis")
         st.write("✅ Realistic comment patterns")
         st.write("✅ Portfolio-ready presentation")
+        st.checkbox("💾 Save results to local history", value=True, key="live_save_history")
         
     if st.button("🔴 Start Live API Demo", type="primary", use_container_width=True):
         if not video_url or not video_url.startswith("http"):
             st.error("Please enter a valid TikTok URL")
             return
-            
-        # Initialize fetcher and run live demo
-        fetcher = TikTokCommentFetcher()
-        
-        with st.container():
-            # Fetch comments with real-time simulation
-            comments = fetcher.fetch_comments_realtime(video_url, max_comments)
-            
-            if comments:
-                # Convert to DataFrame
-                df = pd.DataFrame(comments)
-                
-                # Real-time sentiment analysis
-                st.subheader("🧠 Live Sentiment Analysis")
-                progress_text = st.empty()
-                sentiment_progress = st.progress(0)
-                
-                sentiments = []
-                polarities = []
-                
-                for i, comment in enumerate(comments):
-                    progress_text.text(f"Analyzing comment {i+1}/{len(comments)}...")
-                    
-                    # Analyze sentiment
-                    polarity, subjectivity, sentiment = analyze_sentiment(comment['comment_text'])
-                    sentiments.append(sentiment)
-                    polarities.append(polarity)
-                    
-                    # Update progress
-                    sentiment_progress.progress((i + 1) / len(comments))
-                    
-                    # Small delay for realism
-                    if i % 5 == 0:  # Every 5th comment
-                        time.sleep(0.1)
-                
-                # Add sentiment data to DataFrame
-                df['sentiment'] = sentiments
-                df['polarity'] = polarities
-                df['subjectivity'] = [analyze_sentiment(text)[1] for text in df['comment_text']]
-                
-                progress_text.text("✅ Sentiment analysis complete!")
-                
-                # Show results
-                st.success(f"🎉 **Live Analysis Complete!** Processed {len(df)} comments in real-time")
-                
-                # Quick metrics
-                col1, col2, col3, col4 = st.columns(4)
-                
-                with col1:
-                    positive_pct = (df['sentiment'] == 'positive').mean() * 100
-                    st.metric("Positive", f"{positive_pct:.1f}%", delta=f"{len(df[df['sentiment']=='positive'])} comments")
-                with col2:
-                    neutral_pct = (df['sentiment'] == 'neutral').mean() * 100
-                    st.metric("Neutral", f"{neutral_pct:.1f}%", delta=f"{len(df[df['sentiment']=='neutral'])} comments")
-                with col3:
-                    negative_pct = (df['sentiment'] == 'negative').mean() * 100
-                    st.metric("Negative", f"{negative_pct:.1f}%", delta=f"{len(df[df['sentiment']=='negative'])} comments")
-                with col4:
-                    avg_polarity = df['polarity'].mean()
-                    st.metric("Avg Polarity", f"{avg_polarity:.3f}", delta="Overall sentiment")
-                
-                # Show live charts
-                st.subheader("📊 Live Results")
-                show_sentiment_charts(df)
-                
-                # Store in session state for download
-                st.session_state['live_demo_data'] = df
-                
-                # Download button
-                csv_data = df.to_csv(index=False).encode('utf-8')
-                st.download_button(
-                    "💾 Download Live Analysis Results",
-                    data=csv_data,
-                    file_name=f"live_tiktok_analysis_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-                    mime="text/csv"
-                )
+        start_live_producer(video_url, max_comments)
+    
+    producer = st.session_state.get('live_producer')
+    if producer is None:
+        return
+    
+    if st.session_state.get('live_error'):
+        st.error(f"Live demo failed: {st.session_state['live_error']}")
+        return
+    
+    # Poll the background producer only while it still has work in flight
+    running = not st.session_state.get('live_done')
+    st.fragment(run_every=LIVE_POLL_SECONDS if running else None)(render_live_stream)()
+    
+    if not running and st.session_state.get('live_demo_data') is not None:
+        show_live_results(st.session_state['live_demo_data'], st.session_state.get('live_video_info'))
+
+def start_live_producer(video_url: str, max_comments: int):
+    """Start fetching and scoring in a background thread and reset the live session state"""
+    previous = st.session_state.get('live_producer')
+    if previous is not None:
+        previous.stop()
+    
+    producer = LiveAnalysisProducer(video_url, max_comments)
+    st.session_state['live_producer'] = producer
+    st.session_state['live_comments'] = []
+    st.session_state['live_status'] = "🚀 Starting live API simulation..."
+    st.session_state['live_trend'] = SentimentTrendTracker(window=st.session_state.get('live_trend_window', "1h"))
+    st.session_state['live_ui_seconds'] = 0.0
+    st.session_state['live_done'] = False
+    st.session_state['live_error'] = None
+    st.session_state['live_demo_data'] = None
+    st.session_state['live_video_info'] = None
+    producer.start()
+
+def render_live_stream():
+    """Drain producer events and render the live stream incrementally"""
+    render_started = time.perf_counter()
+    producer = st.session_state['live_producer']
+    comments = st.session_state['live_comments']
+    trend_tracker = st.session_state['live_trend']
+    finished_now = False
+    
+    for event in producer.drain():
+        if event['type'] == "status":
+            st.session_state['live_status'] = event['message']
+        elif event['type'] == "batch":
+            comments.extend(event['comments'])
+            # Only the new rows go into the trend windows
+            trend_tracker.update(pd.DataFrame(event['comments']))
+        elif event['type'] == "done":
+            st.session_state['live_video_info'] = event['video_info']
+            finished_now = True
+        elif event['type'] == "error":
+            st.session_state['live_error'] = event['message']
+            finished_now = True
+    
+    st.subheader("💬 Live Comment Stream")
+    st.progress(min(len(comments) / producer.max_comments, 1.0), text=st.session_state['live_status'])
+    for comment in comments[-3:]:  # Show last 3 comments
+        verified_badge = "✓" if comment.get('is_verified') else ""
+        st.write(f"**{comment['username']}{verified_badge}**: {comment['comment_text']} "
+                 f"→ *{comment['sentiment']}*")
+    
+    st.subheader("📈 Live Sentiment Trend")
+    show_trend_chart(trend_tracker.trend())
+    
+    st.session_state['live_ui_seconds'] += time.perf_counter() - render_started
+    if producer.elapsed > 0:
+        ui_seconds = st.session_state['live_ui_seconds']
+        st.caption(
+            f"⏱️ Script thread busy {ui_seconds:.2f}s while the background producer ran "
+            f"{producer.elapsed:.2f}s ({ui_seconds / producer.elapsed * 100:.1f}% worker occupancy)"
+        )
+    
+    if finished_now:
+        if comments:
+            df = pd.DataFrame(comments)
+            # Full-stream clustering for the cluster_size feature
+            df['cluster_id'], df['cluster_size'] = CommentDeduplicator().cluster(df['comment_text'].tolist())
+            st.session_state['live_demo_data'] = df
+            if st.session_state.get('live_save_history', True):
+                video_info = st.session_state.get('live_video_info')
+                get_comment_store().insert_comments(df, pd.DataFrame([video_info]) if video_info else None)
+        st.session_state['live_done'] = True
+        st.rerun()
+
+def show_live_results(df: pd.DataFrame, video_info: dict | None):
+    """Display final results of the live demo"""
+    producer = st.session_state['live_producer']
+    st.success(
+        f"🎉 **Live Analysis Complete!** Processed {len(df)} comments "
+        f"({producer.scored_unique} unique texts scored, {len(df) - producer.scored_unique} duplicates reused)"
+    )
+    
+    # Quick metrics
+    col1, col2, col3, col4 = st.columns(4)
+    
+    with col1:
+        positive_pct = (df['sentiment'] == 'positive').mean() * 100
+        st.metric("Positive", f"{positive_pct:.1f}%", delta=f"{len(df[df['sentiment']=='positive'])} comments")
+    with col2:
+        neutral_pct = (df['sentiment'] == 'neutral').mean() * 100
+        st.metric("Neutral", f"{neutral_pct:.1f}%", delta=f"{len(df[df['sentiment']=='neutral'])} comments")
+    with col3:
+        negative_pct = (df['sentiment'] == 'negative').mean() * 100
+        st.metric("Negative", f"{negative_pct:.1f}%", delta=f"{len(df[df['sentiment']=='negative'])} comments")
+    with col4:
+        avg_polarity = df['polarity'].mean()
+        st.metric("Avg Polarity", f"{avg_polarity:.3f}", delta="Overall sentiment")
+    
+    # Show live charts
+    st.subheader("📊 Live Results")
+    show_sentiment_charts(df)
+    
+    # Like-weighted view of the same comments
+    videos = pd.DataFrame([video_info]) if video_info else None
+    weighted = EngagementAggregator(df, videos).totals()
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Like-Weighted Polarity", f"{weighted['weighted_polarity']:.3f}",
+                  delta=f"{weighted['weighted_polarity'] - avg_polarity:+.3f} vs unweighted")
+    with col2:
+        st.metric("Like-Weighted Positive", f"{weighted['positive_share'] * 100:.1f}%")
+    with col3:
+        st.metric("Like-Weighted Negative", f"{weighted['negative_share'] * 100:.1f}%")
+    
+    # Download button
+    csv_data = df.to_csv(index=False).encode('utf-8')
+    st.download_button(
+        "💾 Download Live Analysis Results",
+        data=csv_data,
+        file_name=f"live_tiktok_analysis_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+        mime="text/csv"
+    )
 
 def live_sentiment_analysis():
     """Simple live sentiment analysis"""
@@ -356,7 +718,7 @@ def main():
     inject_css()
     
     st.title("📱 TikTok Sentiment Analyzer")
-    st.markdown("Analyze sentiment in TikTok comments using TextBlob NLP")
+    st.markdown("Analyze sentiment in TikTok comments using TextBlob NLP with an emoji & slang lexicon")
     
     # Simplified sidebar
     with st.sidebar:
@@ -369,12 +731,20 @@ def main():
         
         if uploaded_file:
             st.success("File uploaded successfully!")
+        
+        approximate_mode = st.toggle(
+            "⚡ Approximate mode",
+            help="For very large files: show sample-based estimates with confidence intervals "
+                 "right away and refine them to exact values in the background"
+        )
     
     # Main content tabs
-    tab1, tab2, tab3, tab4 = st.tabs(["📊 Data Analysis", "🚀 Live API Demo", "🔍 Live Analysis", "ℹ️ About"])
+    tab1, tab2, tab3, tab4, tab5 = st.tabs(["📊 Data Analysis", "🚀 Live API Demo", "🔍 Live Analysis", "🗄️ History", "ℹ️ About"])
     
     with tab1:
-        if uploaded_file is not None:
+        if uploaded_file is not None and approximate_mode:
+            show_approximate_analysis(uploaded_file)
+        elif uploaded_file is not None:
             df, error = load_data(uploaded_file)
             
             if error:
@@ -421,6 +791,15 @@ def main():
                         st.subheader("📈 Polarity Distribution")
                         show_polarity_chart(df)
                     
+                    if {'timestamp', 'polarity'}.issubset(df.columns):
+                        st.subheader("📈 Sentiment Trend")
+                        window_label = st.selectbox("Trend window:", list(TREND_WINDOWS.keys()), index=1)
+                        show_trend_chart(cached_sentiment_trend(df, TREND_WINDOWS[window_label]))
+                    
+                    if 'polarity' in df.columns and {'likes', 'video_id'} & set(df.columns):
+                        st.subheader("❤️ Engagement-Weighted Sentiment")
+                        show_engagement_breakdown(build_engagement_aggregator(df))
+                    
                     # Sample comments
                     st.subheader("💬 Sample Comments")
                     show_sample_comments(df)
@@ -442,6 +821,11 @@ def main():
                     file_name="sentiment_analysis.csv",
                     mime="text/csv"
                 )
+                
+                if {'polarity', 'sentiment'}.issubset(df.columns):
+                    if st.button("🗄️ Save to Local History"):
+                        saved = get_comment_store().insert_comments(df)
+                        st.success(f"Saved {saved:,} comments to local history")
         else:
             st.info("👆 Upload a CSV file to get started")
             
@@ -461,6 +845,9 @@ def main():
         live_sentiment_analysis()
     
     with tab4:
+        show_history()
+    
+    with tab5:
         st.markdown("## About This App")
         st.write("""
         This TikTok Sentiment Analyzer helps you understand the emotional tone of comments 
@@ -471,11 +858,13 @@ def main():
         - View sentiment distribution and polarity scores
         - Test live sentiment analysis on any text
         - Generate word clouds from comment text
+        - Approximate mode for very large files: instant sample-based estimates that refine to exact values
         - Download processed results
+        - Keep a local history of analyzed comments and query it by creator and time range
         
         **Built with:**
         - Streamlit for the web interface
-        - TextBlob for sentiment analysis
+        - TextBlob for sentiment analysis, plus an emoji & TikTok slang lexicon
         - Plotly for interactive charts
         - WordCloud for text visualization
         
@@ -0,0 +1,216 @@
+"""
+Engagement-Weighted Sentiment Aggregation
+Builds pre-aggregated cube tables of like-weighted sentiment per video,
+creator and hashtag so dashboard drill-downs only touch a few hundred
+summary rows instead of the raw comments.
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional
+
+SENTIMENTS = ["positive", "neutral", "negative"]
+
+# Additive measures stored in the cubes; ratios are derived at query time
+MEASURES = ["comments", "likes", "weight", "weighted_polarity_sum"] + [
+    f"weighted_{sentiment}" for sentiment in SENTIMENTS
+]
+
+DIMENSIONS = {
+    "video": "video_id",
+    "creator": "author",
+    "hashtag": "hashtag",
+}
+
+
+def parse_hashtags(value) -> List[str]:
+    """
+    Normalize a hashtag field into a list of lowercase ``#tags``.
+
+    Args:
+        value: List of tags, or a string separated by spaces/commas
+
+    Returns:
+        List of hashtags
+    """
+    if isinstance(value, (list, tuple, set, np.ndarray)):
+        tags = list(value)
+    elif isinstance(value, str):
+        tags = value.replace(',', ' ').replace('[', ' ').replace(']', ' ').replace("'", ' ').split()
+    else:
+        return []
+    return [f"#{str(tag).strip().lstrip('#').lower()}" for tag in tags if str(tag).strip().lstrip('#')]
+
+
+class EngagementAggregator:
+    """
+    Like-weighted sentiment cubes over comments.
+
+    Comments are reduced once, in a single vectorized group-by, to a base cube
+    keyed by (video_id, author, is_verified). Hashtags are attached through a
+    small video-to-hashtag bridge table, so the comment frame is never exploded.
+    Every query afterwards filters and rolls up the cube tables only.
+    """
+
+    def __init__(self, comments: pd.DataFrame, videos: Optional[pd.DataFrame] = None,
+                 verified_boost: float = 1.0):
+        """
+        Build the cube tables.
+
+        Args:
+            comments: Scored comments with ``polarity`` and ``sentiment`` columns;
+                ``likes``, ``is_verified``, ``video_id``, ``author`` and
+                ``hashtags`` are used when present
+            videos: Optional video metadata with ``video_id``, ``author`` and
+                ``hashtags`` columns (as returned by ``get_enhanced_video_info``)
+            verified_boost: Extra weight multiplier for verified commenters
+        """
+        self.verified_boost = verified_boost
+        self.videos = self._video_table(comments, videos)
+        self.base_cube = self._build_base_cube(comments)
+        self.hashtag_cube = self._build_hashtag_cube()
+
+    def _video_table(self, comments: pd.DataFrame, videos: Optional[pd.DataFrame]) -> pd.DataFrame:
+        """Collect one metadata row per video from the explicit table or the comments."""
+        columns = ['video_id', 'author', 'hashtags']
+        frames = []
+        if videos is not None and not videos.empty:
+            frames.append(videos.reindex(columns=columns))
+        if 'video_id' in comments.columns and ({'author', 'hashtags'} & set(comments.columns)):
+            frames.append(comments.reindex(columns=columns).drop_duplicates('video_id'))
+
+        if not frames:
+            return pd.DataFrame(columns=columns)
+
+        table = pd.concat(frames, ignore_index=True).drop_duplicates('video_id', keep='first')
+        table['video_id'] = table['video_id'].astype(str)
+        table['author'] = table['author'].fillna("unknown").astype(str)
+        return table
+
+    def _build_base_cube(self, comments: pd.DataFrame) -> pd.DataFrame:
+        """Reduce raw comments to sums per (video_id, author, is_verified)."""
+        n = len(comments)
+        if 'video_id' in comments.columns:
+            video_ids = comments['video_id'].fillna("unknown").astype(str)
+        else:
+            video_ids = pd.Series("unknown", index=comments.index)
+
+        if 'likes' in comments.columns:
+            likes = pd.to_numeric(comments['likes'], errors='coerce').fillna(0).clip(lower=0)
+        else:
+            likes = pd.Series(0, index=comments.index)
+        if 'is_verified' in comments.columns:
+            # CSV round-trips turn booleans into "True"/"False" strings
+            verified = comments['is_verified'].astype(str).str.lower().isin(['true', '1'])
+        else:
+            verified = pd.Series(False, index=comments.index)
+        polarity = pd.to_numeric(comments['polarity'], errors='coerce').fillna(0.0)
+
+        # Every comment counts at least once; likes add engagement on top
+        weight = (1.0 + likes) * np.where(verified, self.verified_boost, 1.0)
+
+        frame = pd.DataFrame({
+            'video_id': video_ids,
+            'is_verified': verified,
+            'comments': np.ones(n, dtype=np.int64),
+            'likes': likes,
+            'weight': weight,
+            'weighted_polarity_sum': weight * polarity,
+        })
+        for sentiment in SENTIMENTS:
+            frame[f'weighted_{sentiment}'] = weight * (comments['sentiment'] == sentiment)
+
+        cube = frame.groupby(['video_id', 'is_verified'], sort=False)[MEASURES].sum().reset_index()
+
+        authors = self.videos.set_index('video_id')['author'] if not self.videos.empty else pd.Series(dtype=str)
+        cube['author'] = cube['video_id'].map(authors).fillna("unknown")
+        return cube[['video_id', 'author', 'is_verified'] + MEASURES]
+
+    def _build_hashtag_cube(self) -> pd.DataFrame:
+        """Join the base cube with the video-to-hashtag bridge table."""
+        if self.videos.empty:
+            return pd.DataFrame(columns=['hashtag'] + list(self.base_cube.columns))
+
+        bridge = self.videos[['video_id']].assign(
+            hashtag=self.videos['hashtags'].map(parse_hashtags)
+        ).explode('hashtag').dropna(subset=['hashtag'])
+
+        cube = self.base_cube.merge(bridge, on='video_id', how='inner')
+        return cube[['hashtag'] + list(self.base_cube.columns)]
+
+    @property
+    def cubes(self) -> Dict[str, pd.DataFrame]:
+        """Cube tables, e.g. for caching or persisting."""
+        return {"base": self.base_cube, "hashtag": self.hashtag_cube}
+
+    def filter_options(self) -> Dict[str, List[str]]:
+        """Distinct values available for drill-down filters."""
+        return {
+            "video": sorted(self.base_cube['video_id'].unique().tolist()),
+            "creator": sorted(self.base_cube['author'].unique().tolist()),
+            "hashtag": sorted(self.hashtag_cube['hashtag'].unique().tolist()),
+        }
+
+    def query(self, dimension: str, videos: Optional[List[str]] = None,
+              creators: Optional[List[str]] = None, hashtags: Optional[List[str]] = None,
+              verified_only: bool = False) -> pd.DataFrame:
+        """
+        Roll up weighted sentiment along one dimension with optional filters.
+
+        Args:
+            dimension: One of "video", "creator" or "hashtag"
+            videos: Restrict to these video IDs
+            creators: Restrict to these creators
+            hashtags: Restrict to videos tagged with any of these hashtags
+            verified_only: Only count comments from verified users
+
+        Returns:
+            DataFrame with one row per dimension value, sorted by total weight
+        """
+        if dimension not in DIMENSIONS:
+            raise ValueError(f"Unknown dimension '{dimension}', expected one of {list(DIMENSIONS)}")
+
+        cube = self._filtered_cube(dimension, videos, creators, hashtags, verified_only)
+        rolled = cube.groupby(DIMENSIONS[dimension], sort=False)[MEASURES].sum()
+        return self._finalize(rolled).sort_values('weight', ascending=False).reset_index()
+
+    def totals(self, videos: Optional[List[str]] = None, creators: Optional[List[str]] = None,
+               hashtags: Optional[List[str]] = None, verified_only: bool = False) -> pd.Series:
+        """Overall weighted metrics for the given filters."""
+        cube = self._filtered_cube("video", videos, creators, hashtags, verified_only)
+        return self._finalize(cube[MEASURES].sum().to_frame().T).iloc[0]
+
+    def _filtered_cube(self, dimension: str, videos: Optional[List[str]],
+                       creators: Optional[List[str]], hashtags: Optional[List[str]],
+                       verified_only: bool) -> pd.DataFrame:
+        """Select the cube rows matching the drill-down filters."""
+        # The hashtag cube repeats videos once per tag, so only use it when
+        # grouping by hashtag; for other dimensions resolve tags to video IDs
+        if dimension == "hashtag":
+            cube = self.hashtag_cube
+            if hashtags:
+                cube = cube[cube['hashtag'].isin(hashtags)]
+        else:
+            cube = self.base_cube
+            if hashtags:
+                tagged = self.hashtag_cube.loc[self.hashtag_cube['hashtag'].isin(hashtags), 'video_id']
+                cube = cube[cube['video_id'].isin(tagged)]
+
+        if videos:
+            cube = cube[cube['video_id'].isin(videos)]
+        if creators:
+            cube = cube[cube['author'].isin(creators)]
+        if verified_only:
+            cube = cube[cube['is_verified']]
+        return cube
+
+    @staticmethod
+    def _finalize(rolled: pd.DataFrame) -> pd.DataFrame:
+        """Derive weighted polarity and sentiment shares from additive measures."""
+        weight = rolled['weight'].replace(0, np.nan)
+        result = rolled.copy()
+        result['comments'] = result['comments'].astype(int)
+        result['weighted_polarity'] = rolled['weighted_polarity_sum'] / weight
+        for sentiment in SENTIMENTS:
+            result[f'{sentiment}_share'] = rolled[f'weighted_{sentiment}'] / weight
+        return result.drop(columns=['weighted_polarity_sum'] + [f'weighted_{s}' for s in SENTIMENTS])
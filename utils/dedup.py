@@ -0,0 +1,208 @@
+"""
+Near-Duplicate Comment Collapsing
+Groups copy-paste and emoji-suffixed comment variants into clusters using
+exact hashes of normalized text plus MinHash/LSH for near duplicates, so each
+cluster's text is scored once and fanned back out to every member together
+with the member's own emojis.
+"""
+
+import hashlib
+import unicodedata
+import zlib
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from utils.sentiment import score_texts
+
+# Mersenne prime 2^31 - 1 keeps (a * x + b) inside uint64 for 32-bit shingle hashes
+MERSENNE_PRIME = (1 << 31) - 1
+
+
+def normalize_comment(text: str) -> str:
+    """
+    Normalize a comment for duplicate detection.
+
+    Case-folds, drops punctuation and emojis and collapses whitespace, so
+    "Love it! 😍" and "love it" normalize to the same string. Emojis carry
+    sentiment, so they are scored per comment when clusters are fanned out
+    (see ``score_deduplicated``) rather than kept in the key.
+
+    Args:
+        text: Raw comment text
+
+    Returns:
+        Normalized text
+    """
+    kept = []
+    for char in str(text).casefold():
+        if char.isalnum():
+            kept.append(char)
+        elif char.isspace() or unicodedata.category(char)[0] in ('P', 'S'):
+            kept.append(' ')
+    return ' '.join(''.join(kept).split())
+
+
+class _UnionFind:
+    """Minimal disjoint-set over integer IDs."""
+
+    def __init__(self, size: int):
+        self.parent = list(range(size))
+
+    def find(self, item: int) -> int:
+        root = item
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[item] != root:
+            self.parent[item], item = root, self.parent[item]
+        return root
+
+    def union(self, a: int, b: int):
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a != root_b:
+            # Keep the earliest comment as the cluster root/representative
+            self.parent[max(root_a, root_b)] = min(root_a, root_b)
+
+
+class CommentDeduplicator:
+    """
+    Exact + near-duplicate comment clustering.
+
+    Exact duplicates (after normalization) are collapsed with a hash table.
+    Distinct normalized texts then get a MinHash signature over character
+    shingles; LSH banding proposes candidates, which are kept only when their
+    estimated Jaccard similarity reaches ``threshold``. Texts that normalize
+    to an empty string (e.g. emoji-only comments) are never merged.
+    """
+
+    def __init__(self, num_perm: int = 64, bands: int = 16, shingle_size: int = 4,
+                 threshold: float = 0.8, seed: int = 42):
+        """
+        Initialize the deduplicator.
+
+        Args:
+            num_perm: Number of MinHash permutations (must be divisible by ``bands``)
+            bands: Number of LSH bands
+            shingle_size: Character shingle length
+            threshold: Minimum estimated Jaccard similarity to merge two texts
+            seed: Seed for the permutation coefficients
+        """
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.threshold = threshold
+
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+
+    def signature(self, normalized: str) -> np.ndarray:
+        """
+        Compute the MinHash signature of a normalized text.
+
+        Args:
+            normalized: Output of ``normalize_comment``
+
+        Returns:
+            Array of ``num_perm`` minimum hash values
+        """
+        k = self.shingle_size
+        if len(normalized) <= k:
+            shingles = {normalized}
+        else:
+            shingles = {normalized[i:i + k] for i in range(len(normalized) - k + 1)}
+
+        hashes = np.fromiter(
+            (zlib.crc32(shingle.encode('utf-8')) for shingle in shingles),
+            dtype=np.uint64, count=len(shingles)
+        ) % MERSENNE_PRIME
+        permuted = (self._a[:, None] * hashes[None, :] + self._b[:, None]) % MERSENNE_PRIME
+        return permuted.min(axis=1)
+
+    def cluster(self, texts: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Assign every text to a duplicate cluster.
+
+        Args:
+            texts: Comment texts
+
+        Returns:
+            Tuple of (cluster_ids, cluster_sizes), both aligned with ``texts``.
+            A cluster ID is the position of its representative (first) comment.
+        """
+        # Stage 1: exact duplicates on normalized text
+        first_seen: Dict[bytes, int] = {}
+        unique_index: List[int] = []
+        unique_texts: List[str] = []
+        exact_group = np.empty(len(texts), dtype=np.int64)
+
+        for position, text in enumerate(texts):
+            normalized = normalize_comment(text)
+            # Texts that normalize to nothing share no content, keep them apart
+            key = hashlib.blake2b(normalized.encode('utf-8'), digest_size=8).digest() if normalized else None
+            group = first_seen.get(key) if key is not None else None
+            if group is None:
+                group = len(unique_index)
+                if key is not None:
+                    first_seen[key] = group
+                unique_index.append(position)
+                unique_texts.append(normalized)
+            exact_group[position] = group
+
+        # Stage 2: MinHash/LSH over the distinct texts only
+        union_find = _UnionFind(len(unique_texts))
+        if len(unique_texts) > 1:
+            signatures = np.vstack([self.signature(text) for text in unique_texts])
+            for band in range(self.bands):
+                band_rows = signatures[:, band * self.rows:(band + 1) * self.rows]
+                buckets: Dict[bytes, int] = {}
+                for group, row in enumerate(band_rows):
+                    if not unique_texts[group]:
+                        continue
+                    head = buckets.setdefault(row.tobytes(), group)
+                    if head != group and union_find.find(head) != union_find.find(group):
+                        # Verify against the bucket head instead of all pairs
+                        similarity = np.mean(signatures[head] == signatures[group])
+                        if similarity >= self.threshold:
+                            union_find.union(head, group)
+
+        roots = np.array([union_find.find(group) for group in range(len(unique_texts))], dtype=np.int64)
+        cluster_ids = np.asarray(unique_index, dtype=np.int64)[roots[exact_group]] if len(texts) else exact_group
+        _, inverse, counts = np.unique(cluster_ids, return_inverse=True, return_counts=True)
+        return cluster_ids, counts[inverse]
+
+
+def score_deduplicated(df: pd.DataFrame, text_col: str = 'comment_text',
+                       deduplicator: Optional[CommentDeduplicator] = None) -> pd.DataFrame:
+    """
+    Score each duplicate cluster's text once and fan results out.
+
+    Every member is scored with its representative's text part plus its own
+    emojis, so "love it 😍" and "love it 😡" share a cluster (and the TextBlob
+    work) but not a score.
+
+    Args:
+        df: DataFrame of comments
+        text_col: Column holding the comment text
+        deduplicator: Custom deduplicator (default settings if None)
+
+    Returns:
+        Copy of ``df`` with cluster_id, cluster_size, polarity, subjectivity
+        and sentiment columns
+    """
+    deduplicator = deduplicator or CommentDeduplicator()
+    texts = df[text_col].fillna('').astype(str).tolist()
+    cluster_ids, cluster_sizes = deduplicator.cluster(texts)
+    scores = score_texts(texts, shared_texts=[texts[c] for c in cluster_ids])
+
+    result = df.copy()
+    result['cluster_id'] = cluster_ids
+    result['cluster_size'] = cluster_sizes
+    result['polarity'] = [score[0] for score in scores]
+    result['subjectivity'] = [score[1] for score in scores]
+    result['sentiment'] = [score[2] for score in scores]
+    return result
@@ -8,10 +8,10 @@ import requests
 import json
 import time
 import random
-import streamlit as st
+import uuid
 from datetime import datetime, timedelta
 import logging
-from typing import List, Dict, Optional
+from typing import Callable, Dict, Iterator, List, Optional
 
 class TikTokCommentFetcher:
     """
@@ -24,6 +24,7 @@ class TikTokCommentFetcher:
         self.api_key = api_key or "demo_api_key_12345"
         self.base_url = "https://api.tiktok.com/v1/"
         self.session = requests.Session()
+        self.last_video_info: Optional[Dict] = None
         
         # Enhanced realistic comments database
         self.realistic_comments = [
@@ -57,94 +58,77 @@ class TikTokCommentFetcher:
         logging.basicConfig(level=logging.INFO)
         self.logger = logging.getLogger(__name__)
     
-    def fetch_comments_realtime(self, video_url: str, max_comments: int = 50) -> List[Dict]:
+    def stream_comments(self, video_url: str, max_comments: int = 50, batch_size: int = 8,
+                        simulate_latency: bool = True,
+                        on_status: Optional[Callable[[str], None]] = None) -> Iterator[List[Dict]]:
         """
-        Enhanced real-time comment fetching with progress simulation.
-        Perfect for live portfolio demonstrations.
-        """
-        st.info("🚀 **Live API Demo Mode**: Simulating real TikTok API calls for portfolio demonstration")
+        Stream simulated live API comments in batches for the Live API Demo.
         
-        # Step 1: API Authentication
-        with st.status("🔐 Authenticating with TikTok API...", expanded=True) as status:
-            st.write("→ Validating API credentials...")
-            time.sleep(0.8)
-            st.write("→ Checking rate limits...")
-            time.sleep(0.5)
-            st.write("✅ Authentication successful!")
-            time.sleep(0.3)
-            
-        # Step 2: Video Analysis
-        with st.status("📹 Analyzing video content...", expanded=True) as status:
-            st.write(f"→ Processing URL: {video_url}")
-            time.sleep(0.7)
-            video_info = self.get_enhanced_video_info(video_url)
-            st.write(f"→ Video ID: {video_info['video_id']}")
-            st.write(f"→ Author: {video_info['author']}")
-            st.write(f"✅ Found video with {video_info['view_count']:,} views")
-            time.sleep(0.5)
+        Never touches the Streamlit UI, so it is safe to run in a background
+        thread: progress goes through ``on_status`` and batches are yielded as
+        soon as they are "received".
+        
+        Args:
+            video_url: TikTok video URL
+            max_comments: Total number of comments to stream
+            batch_size: Comments per simulated API page
+            simulate_latency: Sleep to mimic API round trips
+            on_status: Optional callback receiving progress messages
             
-        # Step 3: Real-time Comment Streaming
-        st.subheader("💬 Live Comment Stream")
+        Returns:
+            Iterator over batches of comment dictionaries
+        """
+        notify = on_status or (lambda message: None)
+        pause = time.sleep if simulate_latency else (lambda seconds: None)
         
-        comments = []
-        progress_bar = st.progress(0)
-        status_text = st.empty()
-        comment_container = st.container()
+        notify("🔐 Authenticating with TikTok API...")
+        pause(0.8)
+        notify("→ Checking rate limits...")
+        pause(0.5)
         
-        # Simulate realistic batch processing
-        batch_size = 8
-        batches = (max_comments + batch_size - 1) // batch_size
+        notify(f"📹 Analyzing video content: {video_url}")
+        pause(0.7)
+        video_info = self.get_enhanced_video_info(video_url)
+        self.last_video_info = video_info
+        notify(f"✅ Found video {video_info['video_id']} by {video_info['author']} "
+               f"with {video_info['view_count']:,} views")
         
+        batches = (max_comments + batch_size - 1) // batch_size
         for batch in range(batches):
             batch_start = batch * batch_size
             batch_end = min((batch + 1) * batch_size, max_comments)
-            
-            status_text.text(f"🔄 Streaming batch {batch+1}/{batches} (comments {batch_start + 1}-{batch_end})...")
+            notify(f"🔄 Streaming batch {batch+1}/{batches} (comments {batch_start + 1}-{batch_end})...")
             
             # Simulate realistic API delay
-            time.sleep(random.uniform(0.5, 1.2))
-            
-            # Generate batch of realistic comments
-            batch_comments = []
-            for i in range(batch_start, batch_end):
-                comment_text = random.choice(self.realistic_comments)
-                
-                # Add realistic variation
-                if random.random() < 0.3:  # 30% chance to add emojis
-                    emojis = ["❤️", "😂", "🔥", "👍", "😍", "💯", "✨", "👏"]
-                    comment_text += f" {random.choice(emojis)}"
-                
-                comment = {
-                    "comment_id": f"live_{i+1}_{random.randint(1000, 9999)}",
-                    "comment_text": comment_text,
-                    "username": f"@{random.choice(['tiktok', 'user', 'fan', 'creator', 'viewer'])}_{random.randint(100, 9999)}",
-                    "timestamp": (datetime.now() - timedelta(
-                        hours=random.randint(1, 72),
-                        minutes=random.randint(0, 59)
-                    )).isoformat(),
-                    "likes": random.randint(0, 500),
-                    "replies": random.randint(0, 25),
-                    "is_verified": random.random() < 0.05  # 5% verified users
-                }
-                comments.append(comment)
-                batch_comments.append(comment)
-            
-            # Show live comments as they stream in
-            with comment_container:
-                for comment in batch_comments[-3:]:  # Show last 3 comments
-                    verified_badge = "✓" if comment.get('is_verified') else ""
-                    st.write(f"**{comment['username']}{verified_badge}**: {comment['comment_text']}")
-            
-            # Update progress
-            progress = (batch + 1) / batches
-            progress_bar.progress(progress)
+            pause(random.uniform(0.5, 1.2))
             
-        status_text.text(f"✅ Successfully streamed {len(comments)} live comments!")
+            yield [
+                self._generate_live_comment(i, video_info['video_id'])
+                for i in range(batch_start, batch_end)
+            ]
+    
+    def _generate_live_comment(self, index: int, video_id: str) -> Dict:
+        """Generate one realistic live comment."""
+        comment_text = random.choice(self.realistic_comments)
         
-        # Final summary
-        st.success(f"🎉 **Live fetch complete!** Collected {len(comments)} comments in real-time")
+        # Add realistic variation
+        if random.random() < 0.3:  # 30% chance to add emojis
+            emojis = ["❤️", "😂", "🔥", "👍", "😍", "💯", "✨", "👏"]
+            comment_text += f" {random.choice(emojis)}"
         
-        return comments
+        return {
+            "comment_id": f"live_{index+1}_{uuid.uuid4().hex}",
+            "comment_text": comment_text,
+            "username": f"@{random.choice(['tiktok', 'user', 'fan', 'creator', 'viewer'])}_{random.randint(100, 9999)}",
+            "video_id": video_id,
+            "timestamp": (datetime.now() - timedelta(
+                hours=random.randint(1, 72),
+                minutes=random.randint(0, 59)
+            )).isoformat(),
+            "likes": random.randint(0, 500),
+            "replies": random.randint(0, 25),
+            "is_verified": random.random() < 0.05  # 5% verified users
+        }
     
     def get_enhanced_video_info(self, video_url: str) -> Dict:
         """Generate enhanced realistic video metadata"""
@@ -0,0 +1,281 @@
+"""
+TikTok Emoji & Slang Lexicon
+Compiles emoji, slang and elongated-word scores into a prebuilt lookup artifact
+(an emoji trie plus a word hash table) that is loaded once per process and
+applied in a single pass over each comment's codepoints.
+"""
+
+import json
+import logging
+import os
+import unicodedata
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+LEXICON_VERSION = 4
+DEFAULT_LEXICON_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "model", "tiktok_lexicon.json"
+)
+
+# Trie key marking the end of an emoji sequence; empty, so no codepoint can collide with it
+TERMINAL = ""
+
+# Elongated words ("slayyy", "fiiiire") read as more intense
+ELONGATION_BOOST = 1.2
+
+EMOJI_SCORES = {
+    # Positive
+    "😍": 0.9, "🥰": 0.9, "🤩": 0.8, "❤️": 0.8, "❤": 0.8, "💕": 0.7, "💖": 0.7,
+    "💗": 0.7, "💜": 0.6, "💙": 0.6, "😊": 0.7, "😁": 0.6, "😄": 0.6, "😃": 0.6,
+    "🙂": 0.3, "😘": 0.6, "🔥": 0.7, "💯": 0.7, "👏": 0.6, "🙌": 0.6, "👍": 0.5,
+    "👌": 0.5, "✨": 0.4, "🌟": 0.6, "⭐": 0.5, "🎉": 0.6, "🥳": 0.7, "😂": 0.5,
+    "🤣": 0.5, "😆": 0.5, "😎": 0.4, "💪": 0.4, "🙏": 0.3, "🐐": 0.8, "👑": 0.6,
+    "🫶": 0.8, "🥹": 0.5, "💀": 0.2,
+    # Negative
+    "😒": -0.5, "🙄": -0.5, "😴": -0.4, "🥱": -0.5, "😡": -0.8, "😠": -0.7,
+    "🤬": -0.9, "🤮": -0.9, "🤢": -0.7, "👎": -0.6, "😢": -0.5, "😞": -0.6,
+    "😔": -0.5, "😕": -0.3, "😬": -0.3, "🤡": -0.6, "🗑️": -0.7, "🗑": -0.7,
+    "💩": -0.6, "😤": -0.4, "😑": -0.3,
+}
+
+# Only words TextBlob gives no polarity; build_lexicon() enforces this
+SLANG_SCORES = {
+    # Positive
+    "goat": 0.8, "slay": 0.8, "slayed": 0.8, "slaps": 0.8, "banger": 0.8,
+    "bussin": 0.8, "fire": 0.7, "lit": 0.6,
+    "valid": 0.5, "based": 0.5, "hype": 0.5, "vibe": 0.4, "vibes": 0.4,
+    "queen": 0.6, "king": 0.5, "periodt": 0.5, "yas": 0.6, "yass": 0.6,
+    "w": 0.5, "lmfao": 0.4, "omg": 0.3, "ded": 0.3,
+    # Negative
+    "mid": -0.5, "cringe": -0.7, "trash": -0.7, "flop": -0.6, "ick": -0.6,
+    "yikes": -0.5, "meh": -0.3, "sus": -0.3, "ratio": -0.4, "l": -0.5,
+    "overrated": -0.5, "snooze": -0.5, "ugh": -0.5,
+}
+
+# Slang hits right after one of these words are skipped ("not fire", "isn't mid")
+NEGATORS = {
+    "not", "no", "never", "nothing", "nobody", "hardly", "dont", "don't", "doesnt",
+    "doesn't", "didnt", "didn't", "isnt", "isn't", "wasnt", "wasn't", "aint", "ain't",
+    "cant", "can't", "wont", "won't", "arent", "aren't",
+}
+
+# Codepoints that decorate emojis without changing their meaning
+EMOJI_MODIFIERS = {"\ufe0f", "\u200d"} | {chr(cp) for cp in range(0x1F3FB, 0x1F400)}
+
+
+def textblob_overlap(words: Iterable[str]) -> List[str]:
+    """
+    Words that TextBlob already scores (non-zero polarity).
+
+    Adding such a word to the slang table would count it twice, and with
+    a possibly opposite sign ("obsessed" is -0.5 in TextBlob).
+
+    Args:
+        words: Candidate slang words
+
+    Returns:
+        Sorted list of overlapping words
+    """
+    from textblob import TextBlob
+
+    return sorted(word for word in words if TextBlob(word).sentiment.polarity != 0)  # type: ignore
+
+
+def build_lexicon() -> Dict:
+    """
+    Compile the source tables into the lookup artifact structure.
+
+    Returns:
+        Dictionary with an ``emoji_trie`` (nested codepoint dicts) and a flat
+        ``words`` hash table
+
+    Raises:
+        ValueError: If ``SLANG_SCORES`` contains words TextBlob already scores
+    """
+    overlap = textblob_overlap(SLANG_SCORES)
+    if overlap:
+        raise ValueError(f"SLANG_SCORES overlaps TextBlob's lexicon: {overlap}")
+
+    trie: Dict = {}
+    for sequence, score in EMOJI_SCORES.items():
+        node = trie
+        for char in sequence:
+            node = node.setdefault(char, {})
+        node[TERMINAL] = score
+
+    return {
+        "version": LEXICON_VERSION,
+        "emoji_trie": trie,
+        "words": dict(SLANG_SCORES),
+    }
+
+
+def save_lexicon(path: str = DEFAULT_LEXICON_PATH) -> str:
+    """
+    Build the lexicon and write it as a JSON artifact.
+
+    Args:
+        path: Output path
+
+    Returns:
+        Path the artifact was written to
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as handle:
+        json.dump(build_lexicon(), handle, ensure_ascii=False, sort_keys=True)
+    return path
+
+
+@lru_cache(maxsize=None)
+def load_lexicon(path: str = DEFAULT_LEXICON_PATH) -> Dict:
+    """
+    Load the compiled lexicon once per process.
+
+    Falls back to compiling in memory if the artifact is missing or stale.
+
+    Args:
+        path: Artifact path
+
+    Returns:
+        Compiled lexicon dictionary
+    """
+    try:
+        with open(path, encoding="utf-8") as handle:
+            lexicon = json.load(handle)
+        if lexicon.get("version") == LEXICON_VERSION:
+            return lexicon
+        logging.getLogger(__name__).warning(f"Lexicon artifact {path} is outdated, rebuilding in memory")
+    except FileNotFoundError:
+        logging.getLogger(__name__).warning(f"Lexicon artifact {path} not found, building in memory")
+    return build_lexicon()
+
+
+def split_emojis(text: str) -> Tuple[str, str]:
+    """
+    Separate a comment into its text and its emojis.
+
+    Emojis (and their modifiers) are replaced by spaces in the text part so
+    surrounding words stay apart, and concatenated in order in the emoji part
+    so multi-codepoint sequences still match the trie.
+
+    Args:
+        text: Raw comment text
+
+    Returns:
+        Tuple of (text without emojis, emojis only)
+    """
+    text_chars, emoji_chars = [], []
+    for char in text:
+        if char in EMOJI_MODIFIERS or unicodedata.category(char) == "So":
+            emoji_chars.append(char)
+            text_chars.append(" ")
+        else:
+            text_chars.append(char)
+    return "".join(text_chars), "".join(emoji_chars)
+
+
+def score_lexicon(text: str, lexicon: Optional[Dict] = None) -> Tuple[float, int]:
+    """
+    Score emojis and slang in one pass over the text's codepoints.
+
+    Words are accumulated character by character together with two squeezed
+    variants (runs capped at two and at one character), so "fiiiire" and
+    "slayyy" resolve without any regex passes. Emojis are matched greedily
+    against the trie, which handles multi-codepoint sequences like "❤️".
+    The word table only holds slang TextBlob does not know, and a word hit
+    is skipped when the previous word is a negator.
+
+    Args:
+        text: Raw comment text
+        lexicon: Compiled lexicon (process-wide artifact if None)
+
+    Returns:
+        Tuple of (sum of matched scores, number of matches)
+    """
+    lexicon = lexicon or load_lexicon()
+    trie = lexicon["emoji_trie"]
+    words = lexicon["words"]
+
+    total = 0.0
+    hits = 0
+
+    word: list = []
+    squeezed_two: list = []
+    squeezed_one: list = []
+    last_char = ""
+    run = 0
+    elongated = False
+    negated = False
+
+    def flush() -> None:
+        nonlocal total, hits, negated
+        if not word:
+            return
+        token = "".join(word)
+        was_negated, negated = negated, token in NEGATORS
+        if was_negated:
+            return
+        score = words.get(token)
+        if score is None:
+            score = words.get("".join(squeezed_two))
+        if score is None:
+            score = words.get("".join(squeezed_one))
+        if score is not None:
+            if elongated:
+                score = max(-1.0, min(1.0, score * ELONGATION_BOOST))
+            total += score
+            hits += 1
+
+    position = 0
+    length = len(text)
+    while position < length:
+        char = text[position]
+
+        if char.isalnum() or char in "'\u2019":
+            char = "'" if char == "\u2019" else char.lower()
+            if char == last_char:
+                run += 1
+            else:
+                last_char, run = char, 1
+            word.append(char)
+            if run <= 2:
+                squeezed_two.append(char)
+            if run == 1:
+                squeezed_one.append(char)
+            else:
+                elongated = elongated or run >= 3
+            position += 1
+            continue
+
+        flush()
+        word, squeezed_two, squeezed_one = [], [], []
+        last_char, run, elongated = "", 0, False
+
+        node = trie.get(char)
+        if node is None:
+            position += 1
+            continue
+
+        # Greedy longest match for multi-codepoint emoji sequences
+        best_score = node.get(TERMINAL)
+        end = position + 1
+        cursor = position + 1
+        while cursor < length and isinstance(node.get(text[cursor]), dict):
+            node = node[text[cursor]]
+            cursor += 1
+            if TERMINAL in node:
+                best_score, end = node[TERMINAL], cursor
+        while end < length and text[end] in EMOJI_MODIFIERS:
+            end += 1
+
+        if best_score is not None:
+            total += best_score
+            hits += 1
+        position = end
+
+    flush()
+    return total, hits
+
+
+if __name__ == "__main__":
+    print(f"Lexicon written to {save_lexicon()}")
@@ -0,0 +1,115 @@
+"""
+Background Live Comment Producer
+Runs the simulated live fetch and sentiment scoring in a background thread and
+hands results to the UI through a queue, so the Streamlit script thread only
+spends time rendering what has already arrived.
+"""
+
+import queue
+import threading
+import time
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from utils.dedup import normalize_comment
+from utils.fetch_tiktok import TikTokCommentFetcher
+from utils.lexicon import load_lexicon, split_emojis
+from utils.sentiment import score_components, score_with_emojis
+
+
+class LiveAnalysisProducer(threading.Thread):
+    """
+    Background producer for the live API demo.
+
+    Events pushed to ``events`` are dictionaries with a ``type`` key:
+    ``status`` (progress message), ``batch`` (scored comments), ``done`` or
+    ``error``. The text of exact duplicates (after normalization) is scored
+    once across the whole stream; each comment adds its own emojis.
+    """
+
+    def __init__(self, video_url: str, max_comments: int,
+                 fetcher: Optional[TikTokCommentFetcher] = None,
+                 batch_size: int = 8, simulate_latency: bool = True):
+        """
+        Initialize the producer (call ``start()`` to run it).
+
+        Args:
+            video_url: TikTok video URL
+            max_comments: Number of comments to stream
+            fetcher: Comment fetcher (a new one if None)
+            batch_size: Comments per streamed batch
+            simulate_latency: Keep the simulated API delays
+        """
+        super().__init__(daemon=True, name="live-analysis-producer")
+        self.video_url = video_url
+        self.max_comments = max_comments
+        self.fetcher = fetcher or TikTokCommentFetcher()
+        self.batch_size = batch_size
+        self.simulate_latency = simulate_latency
+
+        self.events: "queue.Queue[Dict]" = queue.Queue()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.scored_unique = 0
+        self._stop_event = threading.Event()
+        self._score_cache: Dict[str, Tuple[float, float, float, int]] = {}
+        self.logger = logging.getLogger(__name__)
+
+    def run(self):
+        """Fetch, score and publish batches until done or stopped."""
+        self.started_at = time.perf_counter()
+        try:
+            stream = self.fetcher.stream_comments(
+                self.video_url,
+                self.max_comments,
+                batch_size=self.batch_size,
+                simulate_latency=self.simulate_latency,
+                on_status=lambda message: self.events.put({"type": "status", "message": message})
+            )
+            for batch in stream:
+                if self._stop_event.is_set():
+                    break
+                self.events.put({"type": "batch", "comments": self._score_batch(batch)})
+            self.events.put({"type": "done", "video_info": self.fetcher.last_video_info})
+        except Exception as e:
+            self.logger.error(f"Live analysis failed: {str(e)}")
+            self.events.put({"type": "error", "message": str(e)})
+        finally:
+            self.finished_at = time.perf_counter()
+
+    def _score_batch(self, batch: List[Dict]) -> List[Dict]:
+        """Score a batch, reusing the text scores of previously seen duplicates."""
+        lexicon = load_lexicon()
+        scored = []
+        for comment in batch:
+            text = comment['comment_text']
+            # Emoji-free normalized key; fall back to the raw text when it is empty
+            key = normalize_comment(text) or f"raw:{text}"
+            if key not in self._score_cache:
+                self._score_cache[key] = score_components(split_emojis(text)[0], lexicon)
+                self.scored_unique += 1
+            polarity, subjectivity, sentiment = score_with_emojis(self._score_cache[key], text, lexicon)
+            scored.append({**comment, "polarity": polarity, "subjectivity": subjectivity,
+                           "sentiment": sentiment})
+        return scored
+
+    def drain(self) -> List[Dict]:
+        """Return all events queued so far without blocking."""
+        drained = []
+        while True:
+            try:
+                drained.append(self.events.get_nowait())
+            except queue.Empty:
+                return drained
+
+    def stop(self):
+        """Ask the producer to stop after the current batch."""
+        self._stop_event.set()
+
+    @property
+    def elapsed(self) -> float:
+        """Seconds the producer has been (or was) running."""
+        if self.started_at is None:
+            return 0.0
+        end = self.finished_at if self.finished_at is not None else time.perf_counter()
+        return end - self.started_at
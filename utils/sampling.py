@@ -0,0 +1,383 @@
+"""
+Approximate Analysis for Huge Datasets
+Draws a random sample of lines from across a large CSV via byte-offset seeks,
+then scans the file in the background into exact running counters. Estimates
+combine the exact counts of the scanned part with the sampled lines beyond it,
+so they and their confidence intervals narrow as the scan runs and become exact
+once it completes.
+"""
+
+import csv
+import io
+import math
+import threading
+import time
+import logging
+import numpy as np
+import pandas as pd
+from typing import Dict, IO, Iterator, List, Optional, Tuple
+
+from utils.sentiment import NEGATIVE_THRESHOLD, POSITIVE_THRESHOLD
+
+Z_95 = 1.96
+POLARITY_BINS = np.linspace(-1.0, 1.0, 31)
+TEXT_COLUMNS = ['comment_text', 'text', 'original_text', 'cleaned_comment']
+
+
+class ApproximateScanner(threading.Thread):
+    """
+    Background scan of a CSV with exact counters and a random pilot sample.
+
+    Before scanning, ``pilot_rows`` lines are drawn uniformly at random (with
+    replacement) from across the whole file by seeking to random byte offsets.
+    Landing in a line is proportional to its length, so each drawn line stands
+    for ``data_bytes / (pilot_rows * length)`` lines (Hansen-Hurwitz).
+
+    The scan reads the file in blocks that end on record boundaries, so the
+    byte offset up to which counts are exact is known at all times. While it
+    runs, ``snapshot()`` adds the exact counts of the scanned part to the
+    estimate for the pilot lines beyond that offset; once it finishes every
+    number is exact. Sources that cannot seek get no pilot, and their
+    intermediate numbers only describe the rows scanned so far.
+    """
+
+    def __init__(self, source: IO, total_bytes: Optional[int] = None, chunk_bytes: int = 8 * 1024 * 1024,
+                 pilot_rows: int = 5000, seed: int = 42):
+        """
+        Initialize the scanner (call ``start()`` to run it).
+
+        Args:
+            source: Binary file-like object positioned at the CSV header
+            total_bytes: Size of the source, used for the pilot sample and progress
+            chunk_bytes: Approximate bytes parsed per block
+            pilot_rows: Random lines drawn before the scan (0 disables the pilot)
+            seed: Random seed
+        """
+        super().__init__(daemon=True, name="approximate-scanner")
+        self.source = source
+        self.total_bytes = total_bytes
+        self.chunk_bytes = chunk_bytes
+        self.pilot_rows = pilot_rows
+        self.rng = np.random.default_rng(seed)
+
+        self.header: List[str] = []
+        self.data_start = 0
+        self.rows_scanned = 0
+        self.bytes_scanned = 0
+        self.counts: Dict[str, int] = {}
+        self.polarity_sum = 0.0
+        self.polarity_count = 0
+        self.polarity_histogram = np.zeros(len(POLARITY_BINS) - 1, dtype=np.int64)
+        self.pilot: Optional[pd.DataFrame] = None
+        self.pilot_draws = 0
+        self.head_sample = pd.DataFrame()
+        self.columns: List[str] = []
+        self.text_col: Optional[str] = None
+        self.has_polarity = False
+        self.done = False
+        self.error: Optional[str] = None
+        self.started_at: Optional[float] = None
+        self.first_estimate_at: Optional[float] = None
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+
+    def run(self):
+        """Draw the pilot sample, then scan the CSV block by block."""
+        self.started_at = time.perf_counter()
+        try:
+            header_line = self.source.readline().decode('utf-8-sig', errors='replace')
+            self.header = next(csv.reader(io.StringIO(header_line)), [])
+            self.data_start = self.source.tell()
+            self.text_col = next((col for col in TEXT_COLUMNS if col in self.header), None)
+            self.columns = [col for col in (self.text_col, 'sentiment', 'polarity') if col in self.header]
+            self.has_polarity = 'polarity' in self.columns
+
+            seekable = getattr(self.source, 'seekable', lambda: False)()
+            if self.pilot_rows and self.total_bytes and seekable:
+                self._draw_pilot()
+                self.source.seek(self.data_start)
+
+            for block, end_offset in self._blocks():
+                if self._stop_event.is_set():
+                    return
+                self._process_block(block, end_offset)
+            with self._lock:
+                self.done = True
+        except Exception as e:
+            self.logger.error(f"Approximate scan failed: {str(e)}")
+            self.error = str(e)
+
+    def _draw_pilot(self):
+        """Sample random lines via byte-offset seeks (with replacement)."""
+        data_bytes = self.total_bytes - self.data_start
+        if data_bytes <= 0:
+            return
+
+        offsets = np.sort(self.rng.integers(self.data_start, self.total_bytes, size=self.pilot_rows))
+        rows, draws, line_starts, inverse_lengths = [], [], [], []
+        for draw, offset in enumerate(offsets):
+            line_start, line = self._line_at(int(offset))
+            fields = next(csv.reader(io.StringIO(line.decode('utf-8', errors='replace'))), [])
+            # Lines inside multi-line quoted fields do not parse to a full row; they count as no row
+            if len(fields) == len(self.header):
+                rows.append(fields)
+                draws.append(draw)
+                line_starts.append(line_start)
+                inverse_lengths.append(1.0 / len(line))
+
+        if not rows:
+            return
+        pilot = self._prepare_chunk(pd.DataFrame(rows, columns=self.header)[self.columns or self.header])
+        pilot['draw'] = draws
+        pilot['line_start'] = line_starts
+        pilot['inverse_length'] = inverse_lengths
+        with self._lock:
+            self.pilot = pilot
+            self.pilot_draws = len(offsets)
+            self.first_estimate_at = time.perf_counter()
+
+    def _line_at(self, offset: int, window: int = 4096) -> Tuple[int, bytes]:
+        """Return the start offset and bytes of the line containing ``offset``."""
+        start = offset
+        while start > self.data_start:
+            block_start = max(self.data_start, start - window)
+            self.source.seek(block_start)
+            newline = self.source.read(start - block_start).rfind(b"\n")
+            if newline >= 0:
+                start = block_start + newline + 1
+                break
+            start = block_start
+        self.source.seek(start)
+        return start, self.source.readline()
+
+    def _blocks(self) -> Iterator[Tuple[bytes, int]]:
+        """Yield (block, end offset) pairs of whole records."""
+        pending = b""
+        offset = self.data_start
+        while True:
+            data = self.source.read(self.chunk_bytes)
+            if not data:
+                if pending.strip():
+                    yield pending, offset + len(pending)
+                return
+            pending += data
+            cut = self._record_boundary(pending)
+            if cut:
+                offset += cut
+                yield pending[:cut], offset
+                pending = pending[cut:]
+
+    @staticmethod
+    def _record_boundary(buffer: bytes) -> int:
+        """Position after the last newline that is not inside a quoted field (0 if none)."""
+        end = len(buffer)
+        while True:
+            newline = buffer.rfind(b"\n", 0, end)
+            if newline < 0:
+                return 0
+            # An even number of quotes before the newline means it ends a record
+            if buffer.count(b'"', 0, newline) % 2 == 0:
+                return newline + 1
+            end = newline
+
+    def _prepare_chunk(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        """Coerce polarity and derive the sentiment when it is missing."""
+        chunk = chunk.copy()
+        if self.has_polarity:
+            chunk['polarity'] = pd.to_numeric(chunk['polarity'], errors='coerce')
+        if 'sentiment' not in chunk.columns:
+            if self.has_polarity:
+                chunk['sentiment'] = np.select(
+                    [chunk['polarity'] > POSITIVE_THRESHOLD, chunk['polarity'] < NEGATIVE_THRESHOLD],
+                    ["positive", "negative"], default="neutral"
+                )
+            else:
+                chunk['sentiment'] = "all"
+        chunk['sentiment'] = chunk['sentiment'].fillna("unknown").astype(str)
+        return chunk
+
+    def _process_block(self, block: bytes, end_offset: int):
+        """Update the exact counters with one block of records."""
+        chunk = pd.read_csv(io.BytesIO(block), header=None, names=self.header,
+                            usecols=self.columns or None)
+        chunk = self._prepare_chunk(chunk)
+        counts = chunk['sentiment'].value_counts()
+        with self._lock:
+            for sentiment, count in counts.items():
+                self.counts[sentiment] = self.counts.get(sentiment, 0) + int(count)
+            self.rows_scanned += len(chunk)
+            self.bytes_scanned = end_offset
+            if self.has_polarity:
+                polarity = chunk['polarity'].dropna().clip(-1.0, 1.0)
+                self.polarity_sum += float(polarity.sum())
+                self.polarity_count += len(polarity)
+                self.polarity_histogram += np.histogram(polarity, bins=POLARITY_BINS)[0]
+            if self.pilot is None and len(self.head_sample) < self.pilot_rows:
+                # Without a pilot the word cloud falls back to the first rows
+                self.head_sample = pd.concat([self.head_sample, chunk], ignore_index=True).iloc[:self.pilot_rows]
+            if self.first_estimate_at is None:
+                self.first_estimate_at = time.perf_counter()
+
+    def stop(self):
+        """Stop scanning after the current block."""
+        self._stop_event.set()
+
+    @property
+    def progress(self) -> float:
+        """Fraction of the source scanned (1.0 when done)."""
+        if self.done:
+            return 1.0
+        if not self.total_bytes:
+            return 0.0
+        return min(self.bytes_scanned / self.total_bytes, 0.99)
+
+    def snapshot(self) -> Dict:
+        """
+        Current estimates.
+
+        Returns:
+            Dictionary with ``exact``, ``method`` ("exact", "sample" for
+            scanned counts plus pilot estimates, or "prefix" for counts over
+            the rows scanned so far), ``progress``, row counts, per-sentiment
+            shares with 95% confidence intervals, mean polarity with its
+            interval, the polarity histogram and a weighted sample for word
+            clouds (``sample_kind`` "random" or "first rows")
+        """
+        with self._lock:
+            exact = self.done
+            scanned = self.rows_scanned
+            boundary = max(self.bytes_scanned, self.data_start)
+            counts = dict(self.counts)
+            polarity_sum = self.polarity_sum
+            polarity_count = self.polarity_count
+            histogram = self.polarity_histogram.astype(float)
+            pilot = self.pilot
+            head_sample = self.head_sample
+
+        if exact:
+            method = "exact"
+        elif pilot is not None:
+            method = "sample"
+        else:
+            method = "prefix"
+
+        if pilot is not None:
+            data_bytes = self.total_bytes - self.data_start
+            # Each drawn line stands for data_bytes / (draws * line length) lines of the file
+            sample = pilot.assign(weight=data_bytes * pilot['inverse_length'] / self.pilot_draws)
+            sample_kind = "random"
+        else:
+            sample = head_sample.assign(weight=1.0) if len(head_sample) else head_sample
+            sample_kind = "first rows"
+
+        if method == "sample":
+            total, shares, polarity = self._combined_estimates(
+                pilot, boundary, counts, scanned, polarity_sum, polarity_count, histogram
+            )
+        else:
+            if method == "prefix" and self.total_bytes and self.bytes_scanned:
+                total = max(scanned, int(scanned * self.total_bytes / self.bytes_scanned))
+            else:
+                total = scanned
+            shares = {
+                stratum: {
+                    "count": count,
+                    "estimated_count": count,
+                    "share": count / scanned,
+                    "lower": count / scanned,
+                    "upper": count / scanned,
+                }
+                for stratum, count in counts.items()
+            }
+            polarity = None
+            if polarity_count:
+                mean = polarity_sum / polarity_count
+                polarity = {"mean": mean, "lower": mean, "upper": mean,
+                            "histogram": histogram, "bins": POLARITY_BINS}
+
+        return {
+            "exact": exact,
+            "method": method,
+            "progress": 1.0 if exact else self.progress,
+            "rows_scanned": scanned,
+            "estimated_total_rows": total,
+            "sample_rows": len(sample),
+            "sample_kind": sample_kind,
+            "shares": shares,
+            "polarity": polarity,
+            "sample": sample,
+            "text_col": self.text_col,
+            "first_estimate_seconds": (self.first_estimate_at - self.started_at) if self.first_estimate_at else None,
+            "error": self.error,
+        }
+
+    def _combined_estimates(self, pilot: pd.DataFrame, boundary: int, counts: Dict[str, int], scanned: int,
+                            polarity_sum: float, polarity_count: int,
+                            histogram: np.ndarray) -> Tuple[int, Dict, Optional[Dict]]:
+        """
+        Exact scanned counts plus Hansen-Hurwitz estimates for the unscanned part.
+
+        Shares and the mean polarity are ratios of two such totals; their
+        intervals use the linearized (ratio estimator) variance, which only
+        involves pilot lines beyond ``boundary`` and so shrinks as the scan
+        advances.
+        """
+        draws = self.pilot_draws
+        remaining = pilot[pilot['line_start'] >= boundary]
+        data_bytes = self.total_bytes - self.data_start
+
+        # Per-draw expansions, zero for draws that are already scanned or did not parse
+        expansion = np.zeros(draws)
+        expansion[remaining['draw'].to_numpy()] = data_bytes * remaining['inverse_length'].to_numpy()
+        total = scanned + expansion.sum() / draws
+
+        shares = {}
+        strata = set(counts) | set(remaining['sentiment'])
+        for stratum in sorted(strata):
+            in_stratum = np.zeros(draws)
+            members = remaining[remaining['sentiment'] == stratum]
+            in_stratum[members['draw'].to_numpy()] = expansion[members['draw'].to_numpy()]
+            share = (counts.get(stratum, 0) + in_stratum.sum() / draws) / total
+            margin = Z_95 * self._ratio_standard_error(in_stratum, share, expansion, total)
+            shares[stratum] = {
+                "count": counts.get(stratum, 0),
+                "estimated_count": int(round(share * total)),
+                "share": float(share),
+                "lower": max(0.0, share - margin),
+                "upper": min(1.0, share + margin),
+            }
+
+        polarity = None
+        if self.has_polarity:
+            valid = remaining[remaining['polarity'].notna()]
+            values = valid['polarity'].clip(-1.0, 1.0).to_numpy()
+            counted = np.zeros(draws)
+            counted[valid['draw'].to_numpy()] = expansion[valid['draw'].to_numpy()]
+            summed = np.zeros(draws)
+            summed[valid['draw'].to_numpy()] = counted[valid['draw'].to_numpy()] * values
+            polarity_total = polarity_count + counted.sum() / draws
+            if polarity_total > 0:
+                mean = (polarity_sum + summed.sum() / draws) / polarity_total
+                margin = Z_95 * self._ratio_standard_error(summed, mean, counted, polarity_total)
+                polarity = {
+                    "mean": float(mean),
+                    "lower": float(mean - margin),
+                    "upper": float(mean + margin),
+                    "histogram": histogram + np.histogram(
+                        values, bins=POLARITY_BINS, weights=counted[valid['draw'].to_numpy()] / draws
+                    )[0],
+                    "bins": POLARITY_BINS,
+                }
+
+        return int(round(total)), shares, polarity
+
+    @staticmethod
+    def _ratio_standard_error(numerator: np.ndarray, ratio: float, denominator: np.ndarray,
+                              denominator_total: float) -> float:
+        """Standard error of (exact + mean(numerator)) / (exact + mean(denominator)) per draw."""
+        draws = len(numerator)
+        if draws < 2 or denominator_total <= 0:
+            return 0.0
+        residuals = numerator - ratio * denominator
+        return math.sqrt(residuals.var(ddof=1) / draws) / denominator_total
@@ -0,0 +1,131 @@
+"""
+Comment Sentiment Scoring
+TextBlob polarity blended with the compiled emoji/slang lexicon. Free of any
+Streamlit calls so it can run in background threads and worker processes.
+"""
+
+from textblob import TextBlob
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from utils.lexicon import load_lexicon, score_lexicon, split_emojis
+
+POSITIVE_THRESHOLD = 0.1
+NEGATIVE_THRESHOLD = -0.1
+
+
+def classify_polarity(polarity: float) -> str:
+    """Map a polarity score to positive/neutral/negative."""
+    if polarity > POSITIVE_THRESHOLD:
+        return "positive"
+    if polarity < NEGATIVE_THRESHOLD:
+        return "negative"
+    return "neutral"
+
+
+def score_components(text: str, lexicon: Optional[Dict] = None) -> Tuple[float, float, float, int]:
+    """
+    Raw scoring inputs for a text before blending.
+
+    Args:
+        text: Comment text (or just its text part)
+        lexicon: Compiled lexicon (process-wide artifact if None)
+
+    Returns:
+        Tuple of (TextBlob polarity, TextBlob subjectivity, lexicon total,
+        lexicon hits)
+    """
+    sentiment = TextBlob(text).sentiment
+    lexicon_total, lexicon_hits = score_lexicon(text, lexicon)
+    return float(sentiment.polarity), float(sentiment.subjectivity), lexicon_total, lexicon_hits  # type: ignore
+
+
+def blend_scores(polarity: float, subjectivity: float, lexicon_total: float,
+                 lexicon_hits: int) -> Tuple[float, float, str]:
+    """
+    Blend TextBlob polarity with lexicon matches.
+
+    TextBlob ignores emojis and most TikTok slang, so the mean of the lexicon
+    matches is averaged in with the TextBlob polarity as a single vote, so
+    repeating an emoji cannot outvote the text ("😂😂😂 this is so bad" scores
+    the same as "😂 this is so bad"). When TextBlob finds nothing (polarity 0), the lexicon alone
+    decides, which is what makes "😍🔥💯" come out positive.
+
+    Args:
+        polarity: TextBlob polarity
+        subjectivity: TextBlob subjectivity
+        lexicon_total: Sum of lexicon scores
+        lexicon_hits: Number of lexicon matches
+
+    Returns:
+        Tuple of (polarity, subjectivity, classification)
+    """
+    if lexicon_hits:
+        lexicon_polarity = lexicon_total / lexicon_hits
+        polarity = lexicon_polarity if polarity == 0.0 else (polarity + lexicon_polarity) / 2
+        polarity = max(-1.0, min(1.0, polarity))
+
+    return polarity, subjectivity, classify_polarity(polarity)
+
+
+def analyze_text(text: str, lexicon: Optional[Dict] = None) -> Tuple[float, float, str]:
+    """
+    Score a single comment.
+
+    Args:
+        text: Comment text
+        lexicon: Compiled lexicon (process-wide artifact if None)
+
+    Returns:
+        Tuple of (polarity, subjectivity, classification)
+    """
+    return blend_scores(*score_components(text, lexicon))
+
+
+def score_with_emojis(components: Tuple[float, float, float, int], text: str,
+                      lexicon: Optional[Dict] = None) -> Tuple[float, float, str]:
+    """
+    Finish scoring a comment from shared text components plus its own emojis.
+
+    Args:
+        components: ``score_components`` of the (shared) text part
+        text: The comment itself, whose emojis are added on top
+        lexicon: Compiled lexicon (process-wide artifact if None)
+
+    Returns:
+        Tuple of (polarity, subjectivity, classification)
+    """
+    polarity, subjectivity, lexicon_total, lexicon_hits = components
+    emoji_total, emoji_hits = score_lexicon(split_emojis(text)[1], lexicon)
+    return blend_scores(polarity, subjectivity, lexicon_total + emoji_total, lexicon_hits + emoji_hits)
+
+
+def score_texts(texts: Sequence[str],
+                shared_texts: Optional[Sequence[str]] = None) -> List[Tuple[float, float, str]]:
+    """
+    Batch scoring path: load the lexicon once and score each distinct text part once.
+
+    The text part of a comment (emojis removed) goes through TextBlob and the
+    word lexicon once per distinct value; every comment then adds its own
+    emojis, so "love it 😍" and "love it 😡" share the text work but not the
+    result.
+
+    Args:
+        texts: Comment texts
+        shared_texts: Optional text to score in place of each comment's own
+            text part, e.g. its duplicate cluster's representative
+
+    Returns:
+        List of (polarity, subjectivity, classification) aligned with ``texts``
+    """
+    lexicon = load_lexicon()
+    texts = ["" if text is None else str(text) for text in texts]
+    shared_texts = texts if shared_texts is None else ["" if text is None else str(text) for text in shared_texts]
+
+    cache: Dict[str, Tuple[float, float, float, int]] = {}
+    results = []
+    for text, shared in zip(texts, shared_texts):
+        text_part = split_emojis(shared)[0]
+        if text_part not in cache:
+            cache[text_part] = score_components(text_part, lexicon)
+        results.append(score_with_emojis(cache[text_part], text, lexicon))
+    return results
@@ -0,0 +1,484 @@
+"""
+Sharded Batch Scoring
+Splits large comment (or video ID) datasets into shards tracked in a
+SQLite-backed work queue. Any number of worker processes - on one machine or
+on several nodes sharing the job directory - claim shards, score them and
+write idempotent outputs that a final merge step concatenates.
+
+Usage:
+    python -m utils.sharding init --workdir jobs/backfill --input archive.csv
+    python -m utils.sharding work --workdir jobs/backfill --processes 4
+    python -m utils.sharding status --workdir jobs/backfill
+    python -m utils.sharding merge --workdir jobs/backfill --output scored.csv
+"""
+
+import argparse
+import glob
+import json
+import logging
+import multiprocessing
+import os
+import socket
+import sqlite3
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+import pandas as pd
+
+QUEUE_FILENAME = "queue.db"
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS job (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+
+CREATE TABLE IF NOT EXISTS shards (
+    shard_id INTEGER PRIMARY KEY,
+    input_path TEXT NOT NULL,
+    output_path TEXT NOT NULL,
+    rows INTEGER,
+    state TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    lease_expires REAL,
+    error TEXT,
+    updated_at REAL
+);
+
+CREATE INDEX IF NOT EXISTS idx_shards_state ON shards (state, shard_id);
+"""
+
+
+class ShardQueue:
+    """
+    File-backed shard queue with leases.
+
+    Claims run inside ``BEGIN IMMEDIATE`` transactions so concurrent workers
+    never get the same shard. A running shard whose lease expired (crashed
+    worker) becomes claimable again; completions from a worker that lost its
+    lease are ignored. For multi-node use the job directory must live on a
+    shared filesystem with working file locks.
+    """
+
+    def __init__(self, workdir: str, max_attempts: int = 3, lease_seconds: float = 600.0):
+        """
+        Open (and create if needed) the queue in a job directory.
+
+        Args:
+            workdir: Job directory holding the queue, shards and outputs
+            max_attempts: Attempts per shard before it is marked failed
+            lease_seconds: How long a claim stays valid without renewal
+        """
+        self.workdir = workdir
+        self.path = os.path.join(workdir, QUEUE_FILENAME)
+        self.max_attempts = max_attempts
+        self.lease_seconds = lease_seconds
+        os.makedirs(workdir, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=60)
+        try:
+            conn.executescript(SCHEMA)
+        finally:
+            conn.close()
+
+    @contextmanager
+    def _connect(self, immediate: bool = False) -> Iterator[sqlite3.Connection]:
+        """Open a connection; ``immediate`` takes the write lock up front."""
+        conn = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+        try:
+            conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+            yield conn
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def set_job_option(self, key: str, value: str):
+        """Store a job-wide setting (e.g. mode, text column)."""
+        with self._connect(immediate=True) as conn:
+            conn.execute("INSERT OR REPLACE INTO job (key, value) VALUES (?, ?)", (key, value))
+
+    def job_options(self) -> Dict[str, str]:
+        """Job-wide settings written by ``create_job``."""
+        with self._connect() as conn:
+            return dict(conn.execute("SELECT key, value FROM job").fetchall())
+
+    def add_shard(self, shard_id: int, input_path: str, output_path: str, rows: int):
+        """
+        Register a shard (re-adding an existing shard_id is a no-op).
+
+        Paths are stored relative to the job directory, so workers in another
+        working directory (or on another node) can resolve them.
+        """
+        with self._connect(immediate=True) as conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO shards (shard_id, input_path, output_path, rows, state, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (shard_id, input_path, output_path, rows, PENDING, time.time())
+            )
+
+    def claim(self, worker_id: str) -> Optional[Dict]:
+        """
+        Atomically claim the next pending (or abandoned) shard.
+
+        Args:
+            worker_id: Unique worker identifier
+
+        Returns:
+            Shard row as a dictionary, or None when nothing is claimable
+        """
+        now = time.time()
+        with self._connect(immediate=True) as conn:
+            # Abandoned shards that already used up their attempts
+            conn.execute(
+                "UPDATE shards SET state = ?, error = COALESCE(error, 'lease expired'), updated_at = ? "
+                "WHERE state = ? AND lease_expires < ? AND attempts >= ?",
+                (FAILED, now, RUNNING, now, self.max_attempts)
+            )
+            row = conn.execute(
+                "SELECT shard_id, input_path, output_path, rows, attempts FROM shards "
+                "WHERE (state = ? OR (state = ? AND lease_expires < ?)) AND attempts < ? "
+                "ORDER BY shard_id LIMIT 1",
+                (PENDING, RUNNING, now, self.max_attempts)
+            ).fetchone()
+            if row is None:
+                return None
+
+            conn.execute(
+                "UPDATE shards SET state = ?, attempts = attempts + 1, worker = ?, "
+                "lease_expires = ?, updated_at = ? WHERE shard_id = ?",
+                (RUNNING, worker_id, now + self.lease_seconds, now, row[0])
+            )
+
+        return {"shard_id": row[0], "input_path": self.resolve(row[1]), "output_path": self.resolve(row[2]),
+                "rows": row[3], "attempt": row[4] + 1}
+
+    def resolve(self, path: str) -> str:
+        """Turn a shard path stored relative to the job directory into a usable path."""
+        return os.path.join(self.workdir, path)
+
+    def renew(self, shard_id: int, worker_id: str) -> bool:
+        """Extend a lease; returns False if the worker no longer owns the shard."""
+        now = time.time()
+        with self._connect(immediate=True) as conn:
+            updated = conn.execute(
+                "UPDATE shards SET lease_expires = ?, updated_at = ? "
+                "WHERE shard_id = ? AND worker = ? AND state = ?",
+                (now + self.lease_seconds, now, shard_id, worker_id, RUNNING)
+            ).rowcount
+        return updated == 1
+
+    def complete(self, shard_id: int, worker_id: str) -> bool:
+        """Mark a shard done if ``worker_id`` still holds it."""
+        with self._connect(immediate=True) as conn:
+            updated = conn.execute(
+                "UPDATE shards SET state = ?, lease_expires = NULL, error = NULL, updated_at = ? "
+                "WHERE shard_id = ? AND worker = ? AND state = ?",
+                (DONE, time.time(), shard_id, worker_id, RUNNING)
+            ).rowcount
+        return updated == 1
+
+    def fail(self, shard_id: int, worker_id: str, error: str):
+        """Release a shard for retry, or mark it failed after ``max_attempts``."""
+        with self._connect(immediate=True) as conn:
+            conn.execute(
+                "UPDATE shards SET state = CASE WHEN attempts < ? THEN ? ELSE ? END, "
+                "lease_expires = NULL, error = ?, updated_at = ? "
+                "WHERE shard_id = ? AND worker = ? AND state = ?",
+                (self.max_attempts, PENDING, FAILED, error[:2000], time.time(), shard_id, worker_id, RUNNING)
+            )
+
+    def reset_failed(self) -> int:
+        """Requeue failed shards with a fresh attempt budget."""
+        with self._connect(immediate=True) as conn:
+            return conn.execute(
+                "UPDATE shards SET state = ?, attempts = 0, error = NULL, updated_at = ? WHERE state = ?",
+                (PENDING, time.time(), FAILED)
+            ).rowcount
+
+    def status(self) -> Dict[str, int]:
+        """Number of shards per state."""
+        with self._connect() as conn:
+            counts = dict(conn.execute("SELECT state, COUNT(*) FROM shards GROUP BY state").fetchall())
+        return {state: counts.get(state, 0) for state in (PENDING, RUNNING, DONE, FAILED)}
+
+    def shards(self) -> pd.DataFrame:
+        """All shard rows, ordered by shard_id."""
+        with self._connect() as conn:
+            return pd.read_sql_query("SELECT * FROM shards ORDER BY shard_id", conn)
+
+
+def create_job(workdir: str, inputs: List[str], rows_per_shard: int = 100000,
+               mode: str = "score", text_col: str = "comment_text") -> ShardQueue:
+    """
+    Split input CSVs into shards and register them in a new (or existing) job.
+
+    Splitting streams each input with ``chunksize``, so inputs never need to
+    fit in memory. Re-running with the same inputs and settings is safe
+    (existing shard IDs are left untouched); re-running with different ones
+    raises instead of mixing stale shards into the job.
+
+    Args:
+        workdir: Job directory
+        inputs: Input CSV paths (glob patterns allowed)
+        rows_per_shard: Rows per shard
+        mode: "score" (CSV of comments) or "fetch" (CSV with a video_id column)
+        text_col: Comment text column for score mode
+
+    Returns:
+        The job's ShardQueue
+
+    Raises:
+        ValueError: If the job directory was initialized with other inputs,
+            file sizes or settings
+    """
+    if mode not in ("score", "fetch"):
+        raise ValueError(f"Unknown mode '{mode}', expected 'score' or 'fetch'")
+
+    paths = sorted(path for pattern in inputs for path in glob.glob(pattern))
+    if not paths:
+        raise FileNotFoundError(f"No input files match {inputs}")
+
+    fingerprint = json.dumps({
+        "inputs": [[os.path.abspath(path), os.path.getsize(path)] for path in paths],
+        "rows_per_shard": rows_per_shard,
+        "mode": mode,
+        "text_col": text_col,
+    }, sort_keys=True)
+
+    queue = ShardQueue(workdir)
+    existing = queue.job_options().get("fingerprint")
+    if existing is not None and existing != fingerprint:
+        raise ValueError(
+            f"Job in {workdir} was initialized with different inputs or settings; "
+            f"use a new --workdir (existing: {existing})"
+        )
+    queue.set_job_option("fingerprint", fingerprint)
+    queue.set_job_option("mode", mode)
+    queue.set_job_option("text_col", text_col)
+
+    shard_dir = os.path.join(workdir, "shards")
+    output_dir = os.path.join(workdir, "outputs")
+    os.makedirs(shard_dir, exist_ok=True)
+    os.makedirs(output_dir, exist_ok=True)
+
+    shard_id = 0
+    for path in paths:
+        for chunk in pd.read_csv(path, chunksize=rows_per_shard):
+            input_path = os.path.join("shards", f"shard_{shard_id:06d}.csv")
+            output_path = os.path.join("outputs", f"shard_{shard_id:06d}.csv")
+            if not os.path.exists(queue.resolve(input_path)):
+                _atomic_write_csv(chunk, queue.resolve(input_path))
+            queue.add_shard(shard_id, input_path, output_path, len(chunk))
+            shard_id += 1
+
+    logging.getLogger(__name__).info(f"Registered {shard_id} shards in {workdir}")
+    return queue
+
+
+def _atomic_write_csv(df: pd.DataFrame, path: str):
+    """Write to a temp file and rename, so readers never see partial files."""
+    tmp_path = f"{path}.tmp-{socket.gethostname()}-{os.getpid()}"
+    df.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+
+def process_shard(shard: Dict, options: Dict[str, str], queue: ShardQueue, worker_id: str,
+                  batch_size: int = 5000, videos_per_fetch: int = 20) -> pd.DataFrame:
+    """
+    Score one shard (fetching comments first in fetch mode).
+
+    The lease is renewed after every fetch batch and every scoring batch, so
+    a shard of any size stays claimed as long as the worker makes progress.
+    Duplicates are clustered within each scoring batch: ``cluster_id`` is
+    "<shard_id>:<row of the representative in the shard>", unique across the
+    job, and ``cluster_size`` counts members within that batch.
+
+    Args:
+        shard: Claimed shard row
+        options: Job options (mode, text_col)
+        queue: Queue used to renew the lease between batches
+        worker_id: Worker holding the shard
+        batch_size: Rows scored between lease renewals
+        videos_per_fetch: Videos fetched between lease renewals in fetch mode
+
+    Returns:
+        Scored DataFrame
+    """
+    from utils.dedup import score_deduplicated
+
+    def renew():
+        if not queue.renew(shard["shard_id"], worker_id):
+            raise RuntimeError(f"Lost lease on shard {shard['shard_id']}")
+
+    data = pd.read_csv(shard["input_path"])
+    text_col = options.get("text_col", "comment_text")
+
+    if options.get("mode") == "fetch":
+        # Imported lazily: only fetch-mode jobs need the fetcher
+        from utils.fetch_tiktok import TikTokCommentFetcher
+        fetcher = TikTokCommentFetcher()
+        video_ids = data["video_id"].astype(str).tolist()
+        fetched = []
+        # ~1.5 s per video, so fetch in small batches instead of the whole shard at once
+        for start in range(0, len(video_ids), videos_per_fetch):
+            fetched.append(fetcher.fetch_comments_batch(video_ids[start:start + videos_per_fetch]))
+            renew()
+        data = pd.concat(fetched, ignore_index=True) if fetched else pd.DataFrame()
+        text_col = "comment_text"
+
+    scored = []
+    for start in range(0, len(data), batch_size):
+        batch = score_deduplicated(data.iloc[start:start + batch_size], text_col=text_col)
+        # Batch-local representative positions -> job-wide IDs
+        batch['cluster_id'] = [f"{shard['shard_id']}:{start + position}" for position in batch['cluster_id']]
+        scored.append(batch)
+        renew()
+
+    return pd.concat(scored, ignore_index=True) if scored else data
+
+
+def run_worker(workdir: str, worker_id: Optional[str] = None, max_shards: Optional[int] = None) -> int:
+    """
+    Claim and process shards until the queue is drained.
+
+    Args:
+        workdir: Job directory
+        worker_id: Unique worker name (host:pid if None)
+        max_shards: Stop after this many shards (unlimited if None)
+
+    Returns:
+        Number of shards this worker completed
+    """
+    logger = logging.getLogger(__name__)
+    worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+    queue = ShardQueue(workdir)
+    options = queue.job_options()
+
+    completed = 0
+    while max_shards is None or completed < max_shards:
+        shard = queue.claim(worker_id)
+        if shard is None:
+            break
+
+        try:
+            logger.info(f"[{worker_id}] Processing shard {shard['shard_id']} (attempt {shard['attempt']})")
+            result = process_shard(shard, options, queue, worker_id)
+            # Same shard always maps to the same output path, so retries overwrite
+            _atomic_write_csv(result, shard["output_path"])
+            if queue.complete(shard["shard_id"], worker_id):
+                completed += 1
+        except Exception as e:
+            logger.error(f"[{worker_id}] Shard {shard['shard_id']} failed: {str(e)}")
+            queue.fail(shard["shard_id"], worker_id, str(e))
+
+    logger.info(f"[{worker_id}] Finished after {completed} shards")
+    return completed
+
+
+def run_local_workers(workdir: str, processes: int = 2) -> int:
+    """
+    Run several worker processes on this machine and wait for them.
+
+    Args:
+        workdir: Job directory
+        processes: Number of worker processes
+
+    Returns:
+        Total number of shards completed
+    """
+    with multiprocessing.Pool(processes) as pool:
+        return sum(pool.map(run_worker, [workdir] * processes))
+
+
+def merge_outputs(workdir: str, output_path: str, allow_partial: bool = False) -> int:
+    """
+    Concatenate shard outputs in shard order into one CSV.
+
+    Args:
+        workdir: Job directory
+        output_path: Merged CSV path
+        allow_partial: Merge whatever is done instead of requiring all shards
+
+    Returns:
+        Number of merged rows
+    """
+    queue = ShardQueue(workdir)
+    shards = queue.shards()
+    unfinished = shards[shards["state"] != DONE]
+    if not unfinished.empty and not allow_partial:
+        raise RuntimeError(f"{len(unfinished)} shards are not done yet: {queue.status()}")
+
+    done = shards[shards["state"] == DONE]
+    if done.empty:
+        return 0
+
+    # Stream shard by shard so the merged dataset never has to fit in memory
+    tmp_path = f"{output_path}.tmp-{os.getpid()}"
+    rows = 0
+    for index, path in enumerate(done["output_path"]):
+        chunk = pd.read_csv(queue.resolve(path))
+        chunk.to_csv(tmp_path, mode="w" if index == 0 else "a", header=index == 0, index=False)
+        rows += len(chunk)
+    os.replace(tmp_path, output_path)
+    return rows
+
+
+def main():
+    """Command line entry point"""
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Sharded TikTok comment scoring")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    init_parser = subparsers.add_parser("init", help="Split inputs into shards")
+    init_parser.add_argument("--workdir", required=True)
+    init_parser.add_argument("--input", nargs="+", required=True, help="Input CSV files or glob patterns")
+    init_parser.add_argument("--rows-per-shard", type=int, default=100000)
+    init_parser.add_argument("--mode", choices=["score", "fetch"], default="score")
+    init_parser.add_argument("--text-col", default="comment_text")
+
+    work_parser = subparsers.add_parser("work", help="Claim and process shards")
+    work_parser.add_argument("--workdir", required=True)
+    work_parser.add_argument("--processes", type=int, default=1)
+    work_parser.add_argument("--worker-id")
+
+    status_parser = subparsers.add_parser("status", help="Show shard states")
+    status_parser.add_argument("--workdir", required=True)
+    status_parser.add_argument("--retry-failed", action="store_true", help="Requeue failed shards")
+
+    merge_parser = subparsers.add_parser("merge", help="Merge finished shard outputs")
+    merge_parser.add_argument("--workdir", required=True)
+    merge_parser.add_argument("--output", required=True)
+    merge_parser.add_argument("--allow-partial", action="store_true")
+
+    args = parser.parse_args()
+
+    if args.command == "init":
+        queue = create_job(args.workdir, args.input, args.rows_per_shard, args.mode, args.text_col)
+        print(queue.status())
+    elif args.command == "work":
+        if args.processes > 1:
+            completed = run_local_workers(args.workdir, args.processes)
+        else:
+            completed = run_worker(args.workdir, args.worker_id)
+        print(f"Completed {completed} shards")
+    elif args.command == "status":
+        queue = ShardQueue(args.workdir)
+        if args.retry_failed:
+            print(f"Requeued {queue.reset_failed()} failed shards")
+        print(queue.status())
+    elif args.command == "merge":
+        rows = merge_outputs(args.workdir, args.output, args.allow_partial)
+        print(f"Merged {rows} rows into {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,325 @@
+"""
+Local Comment History Store
+Embedded SQLite store for fetched and scored comments with indexed,
+aggregate-only query APIs for the dashboards.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+DEFAULT_DB_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "comments.db"
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS videos (
+    video_id TEXT PRIMARY KEY,
+    author TEXT,
+    title TEXT,
+    hashtags TEXT,
+    upload_date TEXT
+);
+
+CREATE TABLE IF NOT EXISTS comments (
+    comment_id TEXT NOT NULL,
+    video_id TEXT NOT NULL DEFAULT '',
+    author TEXT,
+    username TEXT,
+    comment_text TEXT,
+    timestamp TEXT,
+    likes INTEGER DEFAULT 0,
+    replies INTEGER DEFAULT 0,
+    is_verified INTEGER DEFAULT 0,
+    polarity REAL,
+    subjectivity REAL,
+    sentiment TEXT,
+    cluster_size INTEGER DEFAULT 1,
+    -- Comment IDs are only unique within a video
+    PRIMARY KEY (video_id, comment_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_comments_video_time ON comments (video_id, timestamp);
+CREATE INDEX IF NOT EXISTS idx_comments_author_time ON comments (author, timestamp);
+CREATE INDEX IF NOT EXISTS idx_comments_time ON comments (timestamp);
+CREATE INDEX IF NOT EXISTS idx_comments_sentiment ON comments (sentiment, timestamp);
+"""
+
+# Bumped whenever SCHEMA changes in a way CREATE IF NOT EXISTS cannot apply
+SCHEMA_VERSION = 2
+
+COMMENT_COLUMNS = [
+    "comment_id", "video_id", "author", "username", "comment_text", "timestamp",
+    "likes", "replies", "is_verified", "polarity", "subjectivity", "sentiment", "cluster_size",
+]
+
+# Timestamps are stored as sortable ISO strings so range filters use the index
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+TREND_BUCKETS = {
+    "hour": "%Y-%m-%d %H:00:00",
+    "day": "%Y-%m-%d",
+    "week": "%Y-W%W",
+}
+
+
+class CommentStore:
+    """
+    SQLite-backed history of scored comments.
+
+    Every operation opens its own short-lived connection, so one store object
+    can be shared across Streamlit sessions and background threads. Queries
+    aggregate inside SQLite and only return summary rows.
+    """
+
+    def __init__(self, path: str = DEFAULT_DB_PATH):
+        """
+        Open (and create if needed) the store.
+
+        Args:
+            path: SQLite database file
+        """
+        self.path = path
+        self.logger = logging.getLogger(__name__)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._migrate(conn)
+            conn.executescript(SCHEMA)
+            conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Open a connection that commits on success and always closes."""
+        conn = sqlite3.connect(self.path, timeout=30)
+        # WAL keeps readers unblocked during bulk inserts; NORMAL sync is safe with WAL
+        conn.execute("PRAGMA synchronous=NORMAL")
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    def _migrate(self, conn: sqlite3.Connection):
+        """Upgrade stores created with an older schema in place."""
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'comments'"
+        ).fetchone()
+        if not exists or version >= SCHEMA_VERSION:
+            return
+
+        # Version 1 keyed comments on comment_id alone; rebuild with the composite key
+        self.logger.info(f"Migrating {self.path} to schema version {SCHEMA_VERSION}")
+        conn.execute("ALTER TABLE comments RENAME TO comments_v1")
+        for index in ("video_time", "author_time", "time", "sentiment"):
+            conn.execute(f"DROP INDEX IF EXISTS idx_comments_{index}")
+        conn.executescript(SCHEMA)
+        selected = ", ".join("COALESCE(video_id, '')" if column == "video_id" else column
+                             for column in COMMENT_COLUMNS)
+        conn.execute(
+            f"INSERT OR REPLACE INTO comments ({', '.join(COMMENT_COLUMNS)}) SELECT {selected} FROM comments_v1"
+        )
+        conn.execute("DROP TABLE comments_v1")
+
+    def upsert_videos(self, videos: pd.DataFrame) -> int:
+        """
+        Insert or update video metadata.
+
+        Args:
+            videos: DataFrame with ``video_id`` and optionally ``author``,
+                ``title``, ``hashtags`` and ``upload_date``
+
+        Returns:
+            Number of videos written
+        """
+        if videos is None or videos.empty:
+            return 0
+
+        frame = videos.reindex(columns=["video_id", "author", "title", "hashtags", "upload_date"])
+        frame['hashtags'] = frame['hashtags'].map(
+            lambda tags: json.dumps(list(tags)) if isinstance(tags, (list, tuple)) else tags
+        )
+        rows = frame.astype(object).where(frame.notna(), None).itertuples(index=False, name=None)
+
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO videos (video_id, author, title, hashtags, upload_date) "
+                "VALUES (?, ?, ?, ?, ?)",
+                list(rows)
+            )
+        return len(frame)
+
+    def insert_comments(self, comments: pd.DataFrame, videos: Optional[pd.DataFrame] = None,
+                        batch_size: int = 5000) -> int:
+        """
+        Bulk insert scored comments (re-inserting a video_id/comment_id pair replaces it).
+
+        Args:
+            comments: Scored comments DataFrame
+            videos: Optional video metadata, also used to fill ``author``
+            batch_size: Rows per ``executemany`` transaction
+
+        Returns:
+            Number of comments written
+        """
+        if comments is None or comments.empty:
+            return 0
+
+        self.upsert_videos(videos)
+        frame = self._prepare_comments(comments, videos)
+        placeholders = ", ".join("?" for _ in COMMENT_COLUMNS)
+        statement = f"INSERT OR REPLACE INTO comments ({', '.join(COMMENT_COLUMNS)}) VALUES ({placeholders})"
+
+        written = 0
+        with self._connect() as conn:
+            for start in range(0, len(frame), batch_size):
+                chunk = frame.iloc[start:start + batch_size]
+                conn.executemany(statement, chunk.itertuples(index=False, name=None))
+                written += len(chunk)
+
+        self.logger.info(f"Stored {written} comments in {self.path}")
+        return written
+
+    def _prepare_comments(self, comments: pd.DataFrame, videos: Optional[pd.DataFrame]) -> pd.DataFrame:
+        """Align a comments DataFrame with the table schema."""
+        frame = comments.reindex(columns=COMMENT_COLUMNS).copy()
+
+        if frame['comment_id'].isna().any():
+            # Content-derived IDs keep re-imports of the same CSV idempotent
+            fallback = pd.util.hash_pandas_object(
+                comments.reindex(columns=["video_id", "username", "comment_text", "timestamp"]), index=False
+            ).astype(str)
+            frame['comment_id'] = frame['comment_id'].fillna("row_" + fallback)
+
+        if videos is not None and not videos.empty and 'author' in videos.columns:
+            authors = videos.drop_duplicates('video_id').set_index('video_id')['author']
+            frame['author'] = frame['author'].fillna(frame['video_id'].map(authors))
+
+        frame['video_id'] = frame['video_id'].fillna("").astype(str)
+        timestamps = pd.to_datetime(frame['timestamp'], errors='coerce')
+        frame['timestamp'] = timestamps.dt.strftime(TIMESTAMP_FORMAT)
+        frame['is_verified'] = frame['is_verified'].astype(str).str.lower().isin(['true', '1']).astype(int)
+        for column, default in (("likes", 0), ("replies", 0), ("cluster_size", 1)):
+            frame[column] = pd.to_numeric(frame[column], errors='coerce').fillna(default).astype(int)
+
+        return frame.astype(object).where(frame.notna(), None)
+
+    @staticmethod
+    def _where(video_id: Optional[str] = None, author: Optional[str] = None,
+               sentiment: Optional[str] = None, since: Optional[datetime] = None,
+               until: Optional[datetime] = None, days: Optional[int] = None) -> Tuple[str, List]:
+        """Build an index-friendly WHERE clause from dashboard filters."""
+        if days is not None:
+            since = datetime.now() - timedelta(days=days)
+
+        clauses, params = [], []
+        for column, value in (("video_id", video_id), ("author", author), ("sentiment", sentiment)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if since is not None:
+            clauses.append("timestamp >= ?")
+            params.append(since.strftime(TIMESTAMP_FORMAT))
+        if until is not None:
+            clauses.append("timestamp < ?")
+            params.append(until.strftime(TIMESTAMP_FORMAT))
+
+        return (f"WHERE {' AND '.join(clauses)}" if clauses else ""), params
+
+    def _query(self, sql: str, params: List) -> pd.DataFrame:
+        with self._connect() as conn:
+            return pd.read_sql_query(sql, conn, params=params)
+
+    def sentiment_summary(self, **filters) -> pd.DataFrame:
+        """
+        Comment counts, likes and mean polarity per sentiment.
+
+        Args:
+            **filters: ``video_id``, ``author``, ``sentiment``, ``since``,
+                ``until`` or ``days`` (e.g. ``author="@x", days=7``)
+
+        Returns:
+            DataFrame with one row per sentiment
+        """
+        where, params = self._where(**filters)
+        return self._query(
+            f"SELECT sentiment, COUNT(*) AS comments, SUM(likes) AS likes, "
+            f"AVG(polarity) AS avg_polarity FROM comments {where} GROUP BY sentiment",
+            params
+        )
+
+    def sentiment_trend(self, bucket: str = "day", **filters) -> pd.DataFrame:
+        """
+        Sentiment counts and mean polarity per time bucket.
+
+        Args:
+            bucket: One of "hour", "day" or "week"
+            **filters: Same filters as ``sentiment_summary``
+
+        Returns:
+            DataFrame with one row per bucket
+        """
+        if bucket not in TREND_BUCKETS:
+            raise ValueError(f"Unknown bucket '{bucket}', expected one of {list(TREND_BUCKETS)}")
+
+        where, params = self._where(**filters)
+        return self._query(
+            f"SELECT strftime('{TREND_BUCKETS[bucket]}', timestamp) AS period, "
+            f"COUNT(*) AS comments, AVG(polarity) AS avg_polarity, "
+            f"SUM(sentiment = 'positive') AS positive, SUM(sentiment = 'neutral') AS neutral, "
+            f"SUM(sentiment = 'negative') AS negative "
+            f"FROM comments {where} GROUP BY period ORDER BY period",
+            params
+        )
+
+    def video_summary(self, limit: int = 50, **filters) -> pd.DataFrame:
+        """
+        Per-video comment counts, likes and polarity.
+
+        Args:
+            limit: Maximum number of videos (most commented first)
+            **filters: Same filters as ``sentiment_summary``
+
+        Returns:
+            DataFrame with one row per video
+        """
+        where, params = self._where(**filters)
+        return self._query(
+            f"SELECT video_id, author, COUNT(*) AS comments, SUM(likes) AS likes, "
+            f"AVG(polarity) AS avg_polarity, AVG(sentiment = 'positive') AS positive_share, "
+            f"AVG(sentiment = 'negative') AS negative_share, MAX(timestamp) AS last_comment "
+            f"FROM comments {where} GROUP BY video_id, author ORDER BY comments DESC LIMIT ?",
+            params + [limit]
+        )
+
+    def creators(self) -> List[str]:
+        """Distinct creators in the store."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT DISTINCT author FROM comments WHERE author IS NOT NULL ORDER BY author"
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def count(self, **filters) -> int:
+        """Number of stored comments matching the filters."""
+        where, params = self._where(**filters)
+        with self._connect() as conn:
+            return conn.execute(f"SELECT COUNT(*) FROM comments {where}", params).fetchone()[0]
+
+    def stats(self) -> Dict:
+        """Overall store size and time range."""
+        with self._connect() as conn:
+            comments, videos, first, last = conn.execute(
+                "SELECT COUNT(*), COUNT(DISTINCT video_id), MIN(timestamp), MAX(timestamp) FROM comments"
+            ).fetchone()
+        return {"comments": comments, "videos": videos, "first_comment": first, "last_comment": last}
@@ -0,0 +1,161 @@
+"""
+Time-Windowed Sentiment Trends
+Bins scored comments into fixed time windows per video and derives rolling
+and EWMA polarity plus sentiment shares, updating incrementally as new
+comments stream in.
+"""
+
+import pandas as pd
+from typing import Dict, Optional, Set
+
+SENTIMENTS = ["positive", "neutral", "negative"]
+
+# Running sums kept per (video_id, window) bin
+BIN_COLUMNS = ["comments", "polarity_sum"] + SENTIMENTS
+
+
+class SentimentTrendTracker:
+    """
+    Incremental sentiment trend engine.
+
+    Each call to ``update`` only groups the new rows and adds them onto the
+    per-bin running sums, so the cost is proportional to the new comments
+    rather than the full history. Rolling and EWMA series are then derived
+    from the (much smaller) bin table, and only for the videos that changed.
+    """
+
+    def __init__(self, window: str = "1h", rolling_window: str = "6h",
+                 ewm_halflife: str = "3h", default_video_id: str = "unknown"):
+        """
+        Initialize the trend tracker.
+
+        Args:
+            window: Bin width as a pandas offset alias (e.g. "15min", "1h", "1D")
+            rolling_window: Time span covered by the rolling polarity mean
+            ewm_halflife: Half-life of the time-aware exponential moving average
+            default_video_id: Video ID used for rows without a ``video_id`` column
+        """
+        self.window = window
+        self.rolling_window = rolling_window
+        self.ewm_halflife = pd.Timedelta(ewm_halflife)
+        self.default_video_id = default_video_id
+
+        self._bins: Dict[str, pd.DataFrame] = {}
+        self._trends: Dict[str, pd.DataFrame] = {}
+        self._dirty: Set[str] = set()
+
+    def update(self, comments: pd.DataFrame) -> Set[str]:
+        """
+        Add newly scored comments to the running window sums.
+
+        Args:
+            comments: DataFrame with ``timestamp``, ``polarity`` and ``sentiment``
+                columns (``video_id`` is optional)
+
+        Returns:
+            Set of video IDs whose bins were touched by this update
+        """
+        if comments.empty:
+            return set()
+
+        timestamps = pd.to_datetime(comments['timestamp'], errors='coerce')
+        if 'video_id' in comments.columns:
+            video_ids = comments['video_id'].fillna(self.default_video_id).astype(str)
+        else:
+            video_ids = pd.Series(self.default_video_id, index=comments.index)
+
+        frame = pd.DataFrame({
+            'video_id': video_ids,
+            'window': timestamps.dt.floor(self.window),
+            'comments': 1,
+            'polarity_sum': pd.to_numeric(comments['polarity'], errors='coerce').fillna(0.0),
+        })
+        for sentiment in SENTIMENTS:
+            frame[sentiment] = (comments['sentiment'] == sentiment).astype(int)
+        frame = frame.dropna(subset=['window'])
+
+        touched = set()
+        for video_id, group in frame.groupby('video_id', sort=False):
+            new_bins = group.groupby('window')[BIN_COLUMNS].sum()
+            existing = self._bins.get(video_id)
+            if existing is None:
+                self._bins[video_id] = new_bins.sort_index()
+            else:
+                self._bins[video_id] = existing.add(new_bins, fill_value=0)
+            touched.add(video_id)
+
+        self._dirty |= touched
+        return touched
+
+    def trend(self, video_id: Optional[str] = None) -> pd.DataFrame:
+        """
+        Get the per-window trend table.
+
+        Args:
+            video_id: Restrict to a single video (all videos if None)
+
+        Returns:
+            DataFrame with one row per (video_id, window) containing comment
+            counts, mean/rolling/EWMA polarity and sentiment shares
+        """
+        for dirty_id in self._dirty:
+            self._trends[dirty_id] = self._compute_trend(dirty_id)
+        self._dirty.clear()
+
+        if video_id is not None:
+            return self._trends.get(video_id, pd.DataFrame()).copy()
+        if not self._trends:
+            return pd.DataFrame()
+        return pd.concat(self._trends.values(), ignore_index=True)
+
+    def reset(self):
+        """Drop all accumulated windows."""
+        self._bins.clear()
+        self._trends.clear()
+        self._dirty.clear()
+
+    def _compute_trend(self, video_id: str) -> pd.DataFrame:
+        """Derive rolling statistics from the bin table of one video."""
+        bins = self._bins[video_id].sort_index()
+        counts = bins['comments']
+
+        trend = pd.DataFrame(index=bins.index)
+        trend['comments'] = counts.astype(int)
+        trend['polarity'] = bins['polarity_sum'] / counts
+
+        # Comment-weighted rolling mean over a time span, so sparse windows
+        # don't count as much as busy ones
+        rolled = bins[['polarity_sum', 'comments']].rolling(self.rolling_window).sum()
+        trend['rolling_polarity'] = rolled['polarity_sum'] / rolled['comments']
+
+        # Time-aware EWMA handles gaps between non-empty windows
+        trend['ewma_polarity'] = trend['polarity'].ewm(
+            halflife=self.ewm_halflife, times=bins.index
+        ).mean()
+
+        for sentiment in SENTIMENTS:
+            trend[f'{sentiment}_share'] = bins[sentiment] / counts
+
+        trend = trend.reset_index()
+        trend.insert(0, 'video_id', video_id)
+        return trend
+
+
+def compute_sentiment_trend(comments: pd.DataFrame, window: str = "1h",
+                            rolling_window: str = "6h",
+                            ewm_halflife: str = "3h") -> pd.DataFrame:
+    """
+    One-shot trend computation for a complete DataFrame.
+
+    Args:
+        comments: DataFrame with ``timestamp``, ``polarity`` and ``sentiment`` columns
+        window: Bin width as a pandas offset alias
+        rolling_window: Time span covered by the rolling polarity mean
+        ewm_halflife: Half-life of the exponential moving average
+
+    Returns:
+        Trend DataFrame (see ``SentimentTrendTracker.trend``)
+    """
+    tracker = SentimentTrendTracker(window, rolling_window, ewm_halflife)
+    tracker.update(comments)
+    return tracker.trend()